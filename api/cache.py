@@ -0,0 +1,180 @@
+import json
+import os
+import time
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, schemas
+
+# --- Grade Cache ---
+# Grade reports and term lists only change when the dataset is re-ingested, so they are cached
+# in Redis under the current dataset version: `grades:v<version>:...`. After an ingest commits,
+# the most-viewed reports and term lists are precomputed into the next version's namespace and
+# only then is the version switched, so users never see a cold cache after a reload.
+# Old namespaces are never deleted, they simply expire.
+# Every method degrades to a no-op (i.e. a cache miss) without Redis, or when Redis is down.
+
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL_SECONDS = int(os.getenv("GRADE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# How long a process trusts its last read of the dataset version before asking Redis again
+VERSION_CHECK_SECONDS = float(os.getenv("GRADE_CACHE_VERSION_CHECK_SECONDS", "5"))
+# How many of the most-viewed reports and term lists an ingest warms
+WARM_TOP_N = int(os.getenv("GRADE_CACHE_WARM_TOP_N", "500"))
+
+VERSION_KEY = "grades:dataset_version"
+NEXT_VERSION_KEY = "grades:dataset_version:next"
+# Published on every version switch, for processes that keep caches of their own (e.g. the bot)
+VERSION_CHANNEL = "grades:dataset_version"
+# View counters; reports are counted by (course, year, semester) since offering IDs change on a full reload
+POPULAR_REPORTS_KEY = "grades:popular:reports"
+POPULAR_TERMS_KEY = "grades:popular:terms"
+
+logger = logging.getLogger(__name__)
+
+
+def offering_key(course_code: str, academic_year: str, semester: str) -> str:
+    return f"{course_code}|{academic_year}|{semester}"
+
+
+class GradeCache:
+    """Versioned Redis cache for grade reports and term lists."""
+
+    def __init__(self, redis_url: Optional[str]):
+        self.client = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self._version: Optional[int] = None
+        self._version_read_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+
+    async def version(self) -> int:
+        """The current dataset version, re-read from Redis at most every VERSION_CHECK_SECONDS."""
+        if self._version is None or time.monotonic() - self._version_read_at > VERSION_CHECK_SECONDS:
+            self._version = int(await self.client.get(VERSION_KEY) or 0)
+            self._version_read_at = time.monotonic()
+        return self._version
+
+    async def _get(self, name: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            return await self.client.get(f"grades:v{await self.version()}:{name}")
+        except RedisError as e:
+            logger.warning(f"Grade cache read failed: {e}")
+            return None
+
+    async def _set(self, name: str, value: str, version: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        try:
+            version = await self.version() if version is None else version
+            await self.client.set(f"grades:v{version}:{name}", value, ex=CACHE_TTL_SECONDS)
+        except RedisError as e:
+            logger.warning(f"Grade cache write failed: {e}")
+
+    async def _count_view(self, counter: str, member: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.client.zincrby(counter, 1, member)
+        except RedisError as e:
+            logger.warning(f"Grade cache view count failed: {e}")
+
+    # Grade reports, by offering ID
+
+    async def get_report(self, offering_id: int) -> Optional[schemas.GradeReport]:
+        cached = await self._get(f"report:{offering_id}")
+        return schemas.GradeReport.model_validate_json(cached) if cached else None
+
+    async def set_report(self, offering_id: int, report: schemas.GradeReport, version: Optional[int] = None) -> None:
+        await self._set(f"report:{offering_id}", report.model_dump_json(), version)
+
+    async def count_report_view(self, report: schemas.GradeReport) -> None:
+        offering = report.offering
+        await self._count_view(POPULAR_REPORTS_KEY, offering_key(offering.course.code, offering.academic_year, offering.semester))
+
+    # Term lists, by course code
+
+    async def get_terms(self, course_code: str) -> Optional[list]:
+        cached = await self._get(f"terms:{course_code.upper()}")
+        return json.loads(cached) if cached else None
+
+    async def set_terms(self, course_code: str, terms: list, version: Optional[int] = None) -> None:
+        await self._set(f"terms:{course_code.upper()}", json.dumps(terms), version)
+
+    async def count_terms_view(self, course_code: str) -> None:
+        await self._count_view(POPULAR_TERMS_KEY, course_code.upper())
+
+    # Versioning
+
+    async def reserve_version(self) -> int:
+        """Reserves the next dataset version number, without switching to it yet."""
+        current = int(await self.client.get(VERSION_KEY) or 0)
+        # Keep the counter ahead of the live version, e.g. if Redis was flushed and the version set by hand
+        reserved = await self.client.incr(NEXT_VERSION_KEY)
+        return max(reserved, current + 1)
+
+    async def switch_version(self, version: int) -> None:
+        """Makes `version` the live dataset version and announces it on VERSION_CHANNEL."""
+        await self.client.set(VERSION_KEY, version)
+        await self.client.publish(VERSION_CHANNEL, version)
+        self._version, self._version_read_at = version, time.monotonic()
+
+    async def popular(self, counter: str, top_n: int) -> list:
+        return await self.client.zrevrange(counter, 0, top_n - 1)
+
+
+# Shared by the API process; scripts and workers create their own for their event loop
+grade_cache = GradeCache(REDIS_URL)
+
+
+def terms_payload(offerings) -> list:
+    """The JSON-ready term list the `/grades/offering/by_course` endpoint returns."""
+    return [schemas.OfferingForCourseResult.model_validate(o).model_dump(mode="json") for o in offerings]
+
+
+async def warm_grade_caches(db: AsyncSession, cache: GradeCache, top_n: int = WARM_TOP_N, warm: bool = True) -> int:
+    """
+    Called after an ingest commits: precomputes the `top_n` most-viewed grade reports and term lists
+    from the new data into a fresh cache version, then switches to it. With `warm=False` it only
+    switches, so the next requests fill the new version. Returns the new version, or 0 if Redis
+    isn't configured.
+    """
+    # Imported here because the grades router itself imports this module
+    from .routers.grades import _prepare_grade_report
+
+    if not cache.enabled:
+        logger.info("REDIS_URL is not set; skipping the grade cache refresh.")
+        return 0
+
+    version = await cache.reserve_version()
+    reports = terms = 0
+    # Left cold, the new version fills from the requests that follow
+    if warm:
+        for member in await cache.popular(POPULAR_REPORTS_KEY, top_n):
+            course_code, academic_year, semester = member.split("|", 2)
+            offering = await crud.get_offering_by_details(db, course_code, academic_year, semester)
+            if offering is None:
+                continue # Dropped by this ingest
+            offering, grades = await crud.get_grades_for_offering(db, offering.id)
+            await cache.set_report(offering.id, _prepare_grade_report(offering, grades), version)
+            reports += 1
+
+        for course_code in await cache.popular(POPULAR_TERMS_KEY, top_n):
+            offerings = await crud.get_terms_for_course(db, course_code)
+            if offerings:
+                await cache.set_terms(course_code, terms_payload(offerings), version)
+                terms += 1
+
+    await cache.switch_version(version)
+    logger.info(f"Grade cache switched to version {version} ({reports} reports and {terms} term lists warmed).")
+    return version
@@ -40,7 +40,18 @@ app.conf.update(
     # Route specific tasks to specific queues.
     task_routes={
         'api.tasks.send_broadcast_message': {'queue': 'broadcasts'},
-    }
+        'api.tasks.dispatch_scheduled_broadcasts': {'queue': 'broadcasts'},
+        # Ingests are long-running, so they get their own queue and never delay a broadcast
+        'api.tasks.ingest_grade_directory': {'queue': 'ingest'},
+    },
+
+    # Periodic tasks run by `celery beat`.
+    beat_schedule={
+        'dispatch-scheduled-broadcasts': {
+            'task': 'api.tasks.dispatch_scheduled_broadcasts',
+            'schedule': float(os.getenv("SCHEDULED_BROADCAST_POLL_SECONDS", "60")),
+        },
+    },
 )
 
 # This block allows the worker to be started directly for testing,
@@ -1,8 +1,9 @@
 import logging
+import re
 from typing import Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, func, and_, literal, null, union_all
+from sqlalchemy.orm import selectinload, joinedload
 
 
 from . import models, schemas
@@ -11,26 +12,101 @@ logger = logging.getLogger(__name__)
 
 # Search Functions 
 
-async def search_courses(db: AsyncSession, query: str) -> List[models.Course]:
-    """Searches for courses by code or name (case-insensitive)."""
+# Department letters, a three-digit number and an optional suffix letter, e.g. CS201A or MTH101
+COURSE_CODE_PATTERN = re.compile(r"^[A-Z]{2,4}\d{3}[A-Z]?$")
+
+def canonicalize_course_code(query: str) -> str:
+    """Normalizes how users type course codes: 'cs 201', 'Cs-201' and 'CS201' all become 'CS201'."""
+    return re.sub(r"[\s\-_.]+", "", query).upper()
+
+async def search_courses(
+    db: AsyncSession, query: str, limit: int = 25, after_code: Optional[str] = None
+) -> Tuple[List[models.Course], bool]:
+    """
+    Searches for courses by code or name (case-insensitive), one page at a time in code order.
+    Returns the page and whether more results follow it; the next page starts after the last code.
+    A query that reads as a course code resolving to exactly one course returns just that course,
+    straight from the primary key; everything else falls through to the substring search.
+    """
+    canonical = canonicalize_course_code(query)
+    if after_code is None and COURSE_CODE_PATTERN.match(canonical):
+        # The code itself, or the code plus a suffix letter (CS201 -> CS201A): all primary-key lookups
+        candidates = [canonical] + ([canonical + chr(c) for c in range(ord('A'), ord('Z') + 1)] if not canonical[-1].isalpha() else [])
+        stmt = select(models.Course).where(models.Course.code.in_(candidates)).order_by(models.Course.code).limit(2)
+        matches = (await db.execute(stmt)).scalars().all()
+        exact = [course for course in matches if course.code == canonical]
+        if exact or len(matches) == 1:
+            return exact or matches, False
+
     search_term = f"%{query}%"
     stmt = select(models.Course).where(
         (models.Course.code.ilike(search_term)) |
+        (models.Course.code.ilike(f"%{canonical}%")) |
         (models.Course.name.ilike(search_term))
-    ).order_by(models.Course.code).limit(25)
+    ).order_by(models.Course.code).limit(limit + 1)
+    if after_code is not None:
+        stmt = stmt.where(models.Course.code > after_code)
     result = await db.execute(stmt)
-    return result.scalars().all()
+    courses = result.scalars().all()
+    # One row past the page tells us whether there is a next page
+    return courses[:limit], len(courses) > limit
 
-async def search_instructors(db: AsyncSession, query: str) -> List[models.Instructor]:
-    """Searches for instructors by name, matching all words in the query."""
+async def search_instructors(
+    db: AsyncSession, query: str, limit: int = 25, after_name: Optional[str] = None
+) -> Tuple[List[models.Instructor], bool]:
+    """
+    Searches for instructors by name, matching all words in the query, one page at a time in name order.
+    Returns the page and whether more results follow it; the next page starts after the last name.
+    """
     query_words = [word.strip() for word in query.split() if word.strip()]
     if not query_words:
-        return []
+        return [], False
 
     conditions = [models.Instructor.name.ilike(f"%{word}%") for word in query_words]
-    stmt = select(models.Instructor).where(and_(*conditions)).order_by(models.Instructor.name).limit(25)
+    stmt = select(models.Instructor).where(and_(*conditions)).order_by(models.Instructor.name).limit(limit + 1)
+    if after_name is not None:
+        stmt = stmt.where(models.Instructor.name > after_name)
     result = await db.execute(stmt)
-    return result.scalars().all()
+    instructors = result.scalars().all()
+    return instructors[:limit], len(instructors) > limit
+
+def _prefix_tsquery(query: str):
+    """Turns free text into a prefix-matching tsquery: 'cs20 intro' -> 'cs20:* & intro:*'."""
+    # Only word characters survive, so the text can't inject tsquery operators
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return None
+    return func.to_tsquery('simple', " & ".join(f"{word}:*" for word in words))
+
+async def search_all(db: AsyncSession, query: str, limit: int = 25) -> List[dict]:
+    """
+    Searches courses (code and title) and instructors together in one query.
+    Both sides are ranked with ts_rank over weighted tsvectors (a course code or an instructor
+    name weighs more than a word in a title) and merged into one list, best match first.
+    """
+    ts_query = _prefix_tsquery(query)
+    if ts_query is None:
+        return []
+
+    courses = select(
+        literal("course").label("type"),
+        models.Course.code.label("code"),
+        null().label("id"),
+        models.Course.name.label("name"),
+        func.ts_rank(models.Course.search_vector, ts_query).label("rank"),
+    ).where(models.Course.search_vector.op("@@")(ts_query))
+    instructors = select(
+        literal("instructor").label("type"),
+        null().label("code"),
+        models.Instructor.id.label("id"),
+        models.Instructor.name.label("name"),
+        func.ts_rank(models.Instructor.search_vector, ts_query).label("rank"),
+    ).where(models.Instructor.search_vector.op("@@")(ts_query))
+
+    merged = union_all(courses, instructors).subquery()
+    stmt = select(merged).order_by(merged.c.rank.desc(), merged.c.name).limit(limit)
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings().all()]
 
 # Offering & Grade Functions
 
@@ -47,23 +123,60 @@ async def get_offering_by_details(db: AsyncSession, course_code: str, academic_y
     result = await db.execute(stmt)
     return result.scalar_one_or_none()
 
+async def get_terms_for_course(
+    db: AsyncSession, course_code: str, from_year: Optional[int] = None, to_year: Optional[int] = None
+) -> List[models.Offering]:
+    """
+    Gets the offerings of a course with their instructors, latest term first,
+    optionally limited to academic years starting between `from_year` and `to_year`.
+    """
+    # Both the filter and the ordering run on the (course_code, term_key DESC) index
+    stmt = select(models.Offering).options(
+        selectinload(models.Offering.instructors)
+    ).where(
+        models.Offering.course_code == course_code.upper()
+    ).order_by(models.Offering.term_key.desc())
+    if from_year is not None:
+        stmt = stmt.where(models.Offering.term_key >= from_year * 10)
+    if to_year is not None:
+        stmt = stmt.where(models.Offering.term_key < (to_year + 1) * 10)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
 async def get_grades_for_offering(db: AsyncSession, offering_id: int) -> Tuple[Optional[models.Offering], List[models.Grade]]:
     """Gets an offering and its associated grade distribution."""
     # Fetch offering with its relationships eagerly loaded
     offering_stmt = select(models.Offering).options(
         selectinload(models.Offering.instructors),
-        selectinload(models.Offering.course)
+        joinedload(models.Offering.course)
     ).where(models.Offering.id == offering_id)
     offering_result = await db.execute(offering_stmt)
     offering = offering_result.scalar_one_or_none()
+    if offering is None:
+        return None, []
 
-    # Fetch grades separately
+    # The distribution normally comes with the offering row itself, as a dense vector
+    if offering.grade_counts is not None:
+        grades = [
+            models.Grade(offering_id=offering.id, grade_type=grade_type, count=count)
+            for grade_type, count in zip(models.GRADE_TYPES, offering.grade_counts) if count
+        ]
+        return offering, grades
+
+    # Offerings ingested before the vector existed: fetch grades separately
     grades_stmt = select(models.Grade).where(models.Grade.offering_id == offering_id)
     grades_result = await db.execute(grades_stmt)
     grades = grades_result.scalars().all()
     
     return offering, grades
 
+async def get_course_summary(db: AsyncSession, course_code: str) -> Optional[dict]:
+    """Gets a course's precomputed summary row from the course_summaries view."""
+    stmt = select(models.course_summaries).where(models.course_summaries.c.course_code == course_code.upper())
+    result = await db.execute(stmt)
+    row = result.mappings().one_or_none()
+    return dict(row) if row else None
+
 # User Management Functions 
 
 async def get_or_create_user(db: AsyncSession, user_data: schemas.UserCreate) -> models.User:
@@ -121,4 +234,44 @@ async def get_all_feedback(db: AsyncSession, skip: int = 0, limit: int = 100) ->
     """Retrieves a paginated list of all feedback entries."""
     stmt = select(models.Feedback).offset(skip).limit(limit).order_by(models.Feedback.submitted_at.desc())
     result = await db.execute(stmt)
-    return result.scalars().all()
\ No newline at end of file
+    return result.scalars().all()
+
+# Broadcast Scheduling Functions
+
+async def create_scheduled_broadcast(db: AsyncSession, broadcast_data: schemas.ScheduledBroadcastCreate) -> models.ScheduledBroadcast:
+    """Stores a broadcast to be picked up by the beat dispatcher at its send time."""
+    scheduled = models.ScheduledBroadcast(
+        message_text=broadcast_data.message_text,
+        audience=broadcast_data.audience.model_dump(mode="json", exclude_none=True) if broadcast_data.audience else None,
+        media=broadcast_data.media.model_dump() if broadcast_data.media else None,
+        send_at=broadcast_data.send_at,
+        repeat_every_minutes=broadcast_data.repeat_every_minutes,
+    )
+    db.add(scheduled)
+    await db.commit()
+    await db.refresh(scheduled)
+    return scheduled
+
+async def get_scheduled_broadcasts(db: AsyncSession, include_inactive: bool = False) -> List[models.ScheduledBroadcast]:
+    """Lists scheduled broadcasts, soonest first. By default only pending ones are returned."""
+    stmt = select(models.ScheduledBroadcast).order_by(models.ScheduledBroadcast.send_at)
+    if not include_inactive:
+        stmt = stmt.where(models.ScheduledBroadcast.status == 'pending')
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+async def cancel_scheduled_broadcast(db: AsyncSession, broadcast_id: int) -> Optional[models.ScheduledBroadcast]:
+    """
+    Cancels a scheduled broadcast so the dispatcher skips it, but only while it is still pending:
+    a queued one-off is already with the worker. Returns the row as it now stands
+    (check its status), or None if there is no such broadcast.
+    """
+    # One conditional UPDATE, so a dispatcher tick running at the same time can't slip in between
+    await db.execute(
+        update(models.ScheduledBroadcast)
+        .where(models.ScheduledBroadcast.id == broadcast_id, models.ScheduledBroadcast.status == 'pending')
+        .values(status='cancelled')
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return await db.get(models.ScheduledBroadcast, broadcast_id, populate_existing=True)
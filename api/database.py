@@ -1,22 +1,37 @@
 import os
+from itertools import cycle
 from typing import AsyncGenerator
 from dotenv import load_dotenv
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
-# Database Configuration & Setup 
+# Database Configuration & Setup
 
 # Load environment variables from the .env file in the project root
 load_dotenv()
 
 # Get the database connection URL from the environment
 DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
+# Serving reads from a SQLite snapshot (READ_MODEL=sqlite, see read_model.py) needs no database;
+# without one, only the endpoints that write (users, feedback, admin) are unavailable.
+DATABASE_OPTIONAL = os.getenv("READ_MODEL", "").lower() == "sqlite"
+if not DATABASE_URL and not DATABASE_OPTIONAL:
     # Fail fast if the database URL isn't configured
     raise RuntimeError("DATABASE_URL environment variable is not set.")
 
-# Create the core async database engine
-engine = create_async_engine(DATABASE_URL, echo=False)
+# Optional read replicas, comma-separated; reads are spread over them round-robin.
+# Without any, reads share the primary's pool.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URL", "").split(",") if url.strip()]
+
+# Connection pool sizes, per process: the primary pool, and each replica's pool
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_POOL_SIZE)))
+DB_READ_MAX_OVERFLOW = int(os.getenv("DB_READ_MAX_OVERFLOW", str(DB_MAX_OVERFLOW)))
+
+# Create the core async database engine (the primary, which takes all writes)
+engine = create_async_engine(DATABASE_URL, echo=False, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW) if DATABASE_URL else None
 
 # Create a session factory to generate new database sessions
 AsyncSessionFactory = sessionmaker(
@@ -25,18 +40,50 @@ AsyncSessionFactory = sessionmaker(
     expire_on_commit=False,  # Important for how FastAPI dependencies work
 )
 
-#  FastAPI Dependency 
+read_engines = [
+    create_async_engine(url, echo=False, pool_size=DB_READ_POOL_SIZE, max_overflow=DB_READ_MAX_OVERFLOW)
+    for url in DATABASE_REPLICA_URLS
+]
+_read_session_factories = cycle(
+    [sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False) for read_engine in read_engines]
+    or [AsyncSessionFactory]
+)
+
+def ReadSessionFactory() -> AsyncSession:
+    """A new session on the next read replica (or on the primary, if no replicas are configured)."""
+    return next(_read_session_factories)()
+
+#  FastAPI Dependencies
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+# Requests with these methods only read, so they can be served by a replica
+READ_ONLY_METHODS = {"GET", "HEAD"}
+
+async def _session_scope(session_factory) -> AsyncGenerator[AsyncSession, None]:
+    async with session_factory() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
     A FastAPI dependency that provides a database session for a single request.
-    
+
+    GET requests (search, grades, ...) get a session on a read replica; everything else gets
+    one on the primary. Routers whose reads must see their own writes use get_primary_db instead.
     This manages the session's lifecycle, ensuring it's always closed
     and that any transactions are rolled back if an error occurs.
     """
-    async with AsyncSessionFactory() as session:
-        try:
-            yield session
-        except Exception:
-            await session.rollback()
-            raise
\ No newline at end of file
+    session_factory = ReadSessionFactory if request.method in READ_ONLY_METHODS else AsyncSessionFactory
+    async for session in _session_scope(session_factory):
+        yield session
+
+async def get_primary_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Like get_db, but always on the primary: for reads that must see a write made just before,
+    e.g. the bot's block check right after an admin blocks someone. The user, feedback
+    and admin routers use it for all of their endpoints.
+    """
+    async for session in _session_scope(AsyncSessionFactory):
+        yield session
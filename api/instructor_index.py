@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+import numpy as np
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .cache import GradeCache
+
+# --- Instructor Name Index ---
+# Substring search finds nothing for a misspelt surname ("chaterjee", "srivastav"), so professor
+# search runs on an in-process trigram index instead. Candidates sharing the most trigrams with the
+# query are re-ranked by edit distance per word. Everything the old substring search found (every query
+# word inside the name, as with ILIKE) is found too, and ranks first. The index is built at startup and
+# rebuilt whenever an ingest switches the dataset version (see cache.py); until it exists, search falls back to SQL.
+
+# How many trigram-overlap candidates get the (slower) edit-distance ranking
+CANDIDATE_POOL = 200
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_name(name: str) -> List[str]:
+    """Lower-cased words of a name, punctuation dropped: 'Amit K. Sharma' -> ['amit', 'k', 'sharma']."""
+    return re.findall(r"[a-z]+", name.lower())
+
+
+def substring_text(name: str) -> str:
+    """
+    What substring matching runs against: the lower-cased name, then a second line with runs of
+    initials joined up, so 'sk' finds 'S. K. Mishra' as well as 'Sk Mishra'.
+    """
+    lowered = name.lower()
+    joined_initials = re.sub(r"\b([a-z])[\s.]+(?=[a-z]\b)", r"\1", lowered)
+    return f"{lowered}\n{joined_initials}"
+
+
+def trigrams(words: List[str]) -> set:
+    """pg_trgm-style trigrams: each word padded with two spaces in front and one behind."""
+    grams = set()
+    for word in words:
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two short words."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def allowed_typos(word: str) -> int:
+    """Edits tolerated in a query word: none for initials, one for short words, up to three for long ones."""
+    if len(word) <= 2:
+        return 0
+    return min(3, 1 + len(word) // 5)
+
+
+def word_distance(query_word: str, name_word: str) -> int:
+    """Distance from a query word to a name word; a prefix of the name word counts as a match."""
+    if name_word.startswith(query_word):
+        return 0
+    # Compare against the name word cut to the query's length too, so a misspelt prefix still matches
+    prefix_distance = edit_distance(query_word, name_word[:len(query_word)])
+    if len(name_word) - len(query_word) >= prefix_distance:
+        return prefix_distance # The full word can't be any closer
+    return min(prefix_distance, edit_distance(query_word, name_word))
+
+
+class InstructorIndex:
+    """Trigram postings over instructor names, with edit-distance ranking of the candidates."""
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.names: List[str] = []
+        self.words: List[List[str]] = []
+        self.texts: List[str] = []
+        self.corpus = ""
+        self.offsets = np.empty(0, dtype=np.int64)
+        self.name_rank = np.empty(0, dtype=np.int64)
+        self.postings: dict = {}
+        self.version: Optional[int] = None
+        self.built_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.built_at is not None
+
+    def build(self, rows: List[Tuple[int, str]], version: Optional[int] = None) -> None:
+        """Replaces the index with `rows` of (instructor id, name). Readers see either the old index or the new one."""
+        words = [normalize_name(name) for _, name in rows]
+        postings = defaultdict(list)
+        for position, name_words in enumerate(words):
+            for gram in trigrams(name_words):
+                postings[gram].append(position)
+
+        # Swap everything in at once, after the new index is complete
+        self.ids = np.array([instructor_id for instructor_id, _ in rows], dtype=np.int64)
+        self.names = [name for _, name in rows]
+        self.words = words
+        self.texts = [substring_text(name) for _, name in rows]
+        # All texts in one string, so a substring is found with one scan instead of a loop over names
+        self.corpus = "\0".join(self.texts)
+        self.offsets = np.cumsum([0] + [len(text) + 1 for text in self.texts[:-1]], dtype=np.int64)
+        self.name_rank = np.argsort(np.argsort(np.array(self.names, dtype=object), kind="stable"), kind="stable")
+        self.postings = {gram: np.array(positions, dtype=np.int32) for gram, positions in postings.items()}
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def search(self, query: str, limit: int = 25) -> List[Tuple[int, str]]:
+        """
+        Returns up to `limit` (id, name) pairs, closest first: names containing every query word
+        as a substring, then names whose every word is within a few typos of the query's.
+        """
+        query_words = normalize_name(query)
+        substrings = query.lower().split()
+        if not query_words or not self.names:
+            return []
+
+        hits = [self.postings[gram] for gram in trigrams(query_words) if gram in self.postings]
+        overlap = np.bincount(np.concatenate(hits), minlength=len(self.names)) if hits else np.zeros(len(self.names), dtype=np.int64)
+
+        # Exact substring hits, as the SQL search finds them ("kumar" -> "Rajkumar Singh"), come first
+        exact = self._containing(substrings)
+        exact = exact[np.lexsort((self.name_rank[exact], -overlap[exact]))]
+        results = [(int(self.ids[position]), self.names[position]) for position in exact[:limit]]
+        if len(results) == limit:
+            return results
+
+        pool = min(CANDIDATE_POOL, int(np.count_nonzero(overlap)))
+        if not pool:
+            return results
+        candidates = np.setdiff1d(np.argpartition(-overlap, pool - 1)[:pool], exact)
+
+        # Names share most of their words (surnames especially), so each word pair is only compared once
+        memo = {}
+
+        def closest(query_word: str, name_words: List[str]) -> int:
+            best = len(query_word)
+            for name_word in name_words:
+                pair = (query_word, name_word)
+                if pair not in memo:
+                    memo[pair] = word_distance(query_word, name_word)
+                best = min(best, memo[pair])
+            return best
+
+        ranked = []
+        for position in candidates:
+            name_words = self.words[position]
+            distances = [closest(word, name_words) for word in query_words]
+            if all(distance <= allowed_typos(word) for word, distance in zip(query_words, distances)):
+                ranked.append((sum(distances), -int(overlap[position]), self.names[position], int(self.ids[position])))
+
+        ranked.sort()
+        return results + [(instructor_id, name) for _, _, name, instructor_id in ranked[:limit - len(results)]]
+
+    def _containing(self, parts: List[str]) -> np.ndarray:
+        """Positions of the names whose text contains every one of `parts`."""
+        longest = max(parts, key=len)
+        found = [match.start() for match in re.finditer(re.escape(longest), self.corpus)]
+        positions = np.unique(np.searchsorted(self.offsets, np.array(found, dtype=np.int64), side="right") - 1)
+        others = [part for part in parts if part != longest]
+        if others:
+            positions = np.array([p for p in positions if all(part in self.texts[p] for part in others)], dtype=np.int64)
+        return positions
+
+    async def load(self, db: AsyncSession, version: Optional[int] = None) -> None:
+        """(Re)builds the index from the instructors table."""
+        started = time.perf_counter()
+        rows = (await db.execute(select(models.Instructor.id, models.Instructor.name))).all()
+        self.build([(row.id, row.name) for row in rows], version)
+        logger.info(f"Instructor index built: {len(rows):,} names in {(time.perf_counter() - started) * 1000:.0f} ms.")
+
+    async def refresh_if_stale(self, session_factory, cache: GradeCache) -> None:
+        """
+        Rebuilds the index if an ingest has switched the dataset version since it was built.
+        Pass the primary's session factory: a replica may not have caught up with the ingest yet.
+        """
+        if not cache.enabled or not self.ready:
+            return
+        try:
+            version = await cache.version()
+        except RedisError as e:
+            logger.warning(f"Could not read the dataset version: {e}")
+            return
+        if version == self.version:
+            return
+        async with self._lock:
+            if version != self.version: # Another request may have rebuilt it while we waited
+                async with session_factory() as db:
+                    await self.load(db, version)
+
+
+# Shared by the API process; built in main.py's lifespan
+instructor_index = InstructorIndex()
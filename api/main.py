@@ -1,9 +1,12 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from slowapi.errors import RateLimitExceeded
 
 # Local Imports 
 # Import the different API endpoint groups (routers)
-from .routers import search, grades, users, feedback, admin_users, admin_broadcast
+from .routers import search, grades, courses, users, feedback, admin_users, admin_broadcast, admin_ingest
 
 # Import utilities for rate limiting
 from .utils.limiter import limiter, _rate_limit_exceeded_handler
@@ -11,11 +14,37 @@ from .utils.limiter import limiter, _rate_limit_exceeded_handler
 # Import the Celery app instance (we alias it to avoid a name conflict with the FastAPI app)
 from .celery_app import app as celery_app
 
+from .cache import grade_cache
+from .database import AsyncSessionFactory
+from .instructor_index import instructor_index
+from .read_model import read_model
+
+logger = logging.getLogger(__name__)
+
+#  Startup 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Builds the in-memory instructor index, or with READ_MODEL=memory the whole in-memory catalogue
+    (which includes the index). If that fails, the affected endpoints fall back to SQL.
+    """
+    try:
+        version = await grade_cache.version() if grade_cache.enabled else None
+        if read_model.enabled:
+            await read_model.load(AsyncSessionFactory, version)
+        else:
+            async with AsyncSessionFactory() as db:
+                await instructor_index.load(db, version)
+    except Exception as e:
+        logger.error(f"Could not build the in-memory catalogue, search and grades will use SQL: {e}")
+    yield
+
 #  FastAPI App Initialization 
 app = FastAPI(
     title="IITK Grade Explorer API",
     description="API backend for fetching IITK course grade distributions.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Middleware & Exception Handlers 
@@ -27,13 +56,15 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 # Register the different parts of our API
 app.include_router(search.router)
 app.include_router(grades.router)
+app.include_router(courses.router)
 app.include_router(users.router)
 app.include_router(feedback.router)
 app.include_router(admin_users.router)
 app.include_router(admin_broadcast.router)
+app.include_router(admin_ingest.router)
 
 # Health Check Endpoint 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """A simple endpoint to check if the API is up and running."""
-    return {"status": "ok"}
\ No newline at end of file
+    """A simple endpoint to check if the API is up and running, and which read model it serves from."""
+    return {"status": "ok", "read_model": read_model.stats()}
\ No newline at end of file
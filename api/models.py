@@ -1,12 +1,24 @@
 from sqlalchemy import (
     Column, Integer, String, VARCHAR, ForeignKey, UniqueConstraint,
-    BIGINT, BOOLEAN, TIMESTAMP, Float, Table
+    BIGINT, BOOLEAN, TIMESTAMP, Float, Table, Index, MetaData, Numeric, DDL, event, Computed
 )
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY, TSVECTOR
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 
 Base = declarative_base()
 
+# The fixed order of the dense per-offering grade vector (Offering.grade_counts):
+# the usual display order first, then the rarer grades the sheet also carries.
+GRADE_TYPES = ['A*', 'A', 'B+', 'B', 'C+', 'C', 'D+', 'D', 'F', 'E', 'S', 'X', 'W', 'I', 'S^']
+
+# Semesters in the order they run within an academic year, for Offering.term_key.
+# term_key = first year of the academic year * 10 + ordinal, e.g. 2023-2024 Even -> 20232.
+SEMESTER_ORDINALS = {'odd': 1, 'even': 2, 'summer': 3}
+
+# Grade points used for a course's mean grade point; S, X, W and I don't count towards it.
+GRADE_POINTS = {'A*': 10, 'A': 10, 'B+': 9, 'B': 8, 'C+': 7, 'C': 6, 'D+': 5, 'D': 4, 'E': 2, 'F': 0}
+
 # Many-to-many association table for Offerings and Instructors
 offering_instructor_association = Table(
     'offering_instructors', Base.metadata,
@@ -19,8 +31,15 @@ class Course(Base):
     __tablename__ = 'courses'
     code = Column(VARCHAR(20), primary_key=True, index=True)
     name = Column(VARCHAR(255), nullable=True, index=True)
+    # Full-text search document: the code outranks words in the title ('simple' config: no stemming or stop words)
+    search_vector = Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', code), 'A') || setweight(to_tsvector('simple', coalesce(name, '')), 'B')",
+        persisted=True,
+    ))
     offerings = relationship("Offering", back_populates="course")
 
+    __table_args__ = (Index('ix_courses_search_vector', 'search_vector', postgresql_using='gin'),)
+
     def __repr__(self):
         return f"<Course(code='{self.code}', name='{self.name}')>"
 
@@ -29,8 +48,11 @@ class Instructor(Base):
     __tablename__ = 'instructors'
     id = Column(Integer, primary_key=True, index=True)
     name = Column(VARCHAR(255), unique=True, index=True, nullable=False)
+    search_vector = Column(TSVECTOR, Computed("setweight(to_tsvector('simple', name), 'A')", persisted=True))
     offerings = relationship("Offering", secondary=offering_instructor_association, back_populates="instructors")
 
+    __table_args__ = (Index('ix_instructors_search_vector', 'search_vector', postgresql_using='gin'),)
+
     def __repr__(self):
         return f"<Instructor(id={self.id}, name='{self.name}')>"
 
@@ -46,8 +68,15 @@ class Offering(Base):
     total_drop = Column(Integer, nullable=True)
     accepted_drop = Column(Integer, nullable=True)
     plot_file_id = Column(VARCHAR(255), nullable=True, index=True)
-
-    __table_args__ = (UniqueConstraint('course_code', 'academic_year', 'semester', name='uq_offering'),)
+    source_hash = Column(VARCHAR(64), nullable=True) # Fingerprint of the source row, used by incremental ingest
+    grade_counts = Column(ARRAY(Integer), nullable=True) # Count per grade, in GRADE_TYPES order; NULL until re-ingested
+    term_key = Column(Integer, nullable=True) # Sortable term, see SEMESTER_ORDINALS; NULL until re-ingested
+
+    __table_args__ = (
+        UniqueConstraint('course_code', 'academic_year', 'semester', name='uq_offering'),
+        # Serves "terms of a course, latest first" and year-range filters straight from the index
+        Index('ix_offerings_course_term', 'course_code', term_key.desc()),
+    )
     
     course = relationship("Course", back_populates="offerings")
     instructors = relationship("Instructor", secondary=offering_instructor_association, back_populates="offerings")
@@ -57,7 +86,10 @@ class Offering(Base):
         return f"<Offering(id={self.id}, course='{self.course_code}', term='{self.semester} {self.academic_year}')>"
 
 class Grade(Base):
-    """Represents the count for a single grade type (e.g., 'A', 'B+') for an offering."""
+    """
+    The count for a single grade type of an offering. The ingest writes only grades outside GRADE_TYPES
+    here (the rest live in Offering.grade_counts); offerings ingested before the vector have all their grades here.
+    """
     __tablename__ = 'grades'
     id = Column(Integer, primary_key=True, index=True)
     offering_id = Column(Integer, ForeignKey('offerings.id', ondelete='CASCADE'), nullable=False, index=True)
@@ -78,8 +110,8 @@ class User(Base):
     last_name = Column(VARCHAR(255), nullable=True)
     username = Column(VARCHAR(255), nullable=True)
     is_subscribed = Column(BOOLEAN, default=True, nullable=False)
-    subscribed_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
-    last_active_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+    subscribed_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), index=True)
+    last_active_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
     is_blocked = Column(BOOLEAN, default=False, nullable=False)
     block_reason = Column(VARCHAR(255), nullable=True)
     blocked_at = Column(TIMESTAMP(timezone=True), nullable=True)
@@ -100,4 +132,113 @@ class Feedback(Base):
     user = relationship("User")
 
     def __repr__(self):
-        return f"<Feedback(id={self.id}, type='{self.feedback_type}', status='{self.status}')>"
\ No newline at end of file
+        return f"<Feedback(id={self.id}, type='{self.feedback_type}', status='{self.status}')>"
+
+class ScheduledBroadcast(Base):
+    """Represents a broadcast queued by an admin to go out at a future (and optionally recurring) time."""
+    __tablename__ = 'scheduled_broadcasts'
+    id = Column(Integer, primary_key=True, index=True)
+    message_text = Column(VARCHAR, nullable=False)
+    audience = Column(JSONB, nullable=True)
+    media = Column(JSONB, nullable=True)
+    send_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    repeat_every_minutes = Column(Integer, nullable=True) # NULL for one-off broadcasts
+    status = Column(VARCHAR(20), default='pending', nullable=False, index=True) # pending, queued, cancelled
+    last_task_id = Column(VARCHAR(255), nullable=True)
+    last_queued_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ScheduledBroadcast(id={self.id}, send_at='{self.send_at}', status='{self.status}')>"
+
+class IngestedFile(Base):
+    """Represents a grade sheet file that has been ingested, keyed by its content checksum."""
+    __tablename__ = 'ingested_files'
+    id = Column(Integer, primary_key=True, index=True)
+    file_name = Column(VARCHAR(255), nullable=False)
+    checksum = Column(VARCHAR(64), nullable=False, unique=True, index=True) # SHA-256 of the file contents
+    row_count = Column(Integer, nullable=False, default=0)
+    ingested_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<IngestedFile(file_name='{self.file_name}', checksum='{self.checksum[:12]}')>"
+
+# --- Course Summary View ---
+# A materialized view with one row per course, so a course's overview is a single indexed lookup.
+# It is not part of Base.metadata (create_all would make it a plain table); the DDL below creates it
+# right after the tables, and ingestion refreshes it CONCURRENTLY, which needs the unique index.
+view_metadata = MetaData()
+
+course_summaries = Table(
+    'course_summaries', view_metadata,
+    Column('course_code', VARCHAR(20), primary_key=True),
+    Column('course_name', VARCHAR(255)),
+    Column('offering_count', Integer),
+    Column('latest_academic_year', VARCHAR(10)),
+    Column('latest_semester', VARCHAR(10)),
+    Column('latest_term_key', Integer),
+    Column('instructor_count', Integer),
+    Column('students_graded', Integer),
+    Column('mean_grade_point', Numeric(4, 2)),
+)
+
+_grade_points_values = ", ".join(f"('{grade}', {points})" for grade, points in GRADE_POINTS.items())
+_grade_slot_values = ", ".join(f"('{grade}', {slot})" for slot, grade in enumerate(GRADE_TYPES, start=1))
+
+# Unqualified names on purpose: the view binds to whichever tables the search_path resolves to,
+# which is how the shadow ingest builds it alongside its shadow tables.
+COURSE_SUMMARY_DDL = [
+    f"""CREATE MATERIALIZED VIEW IF NOT EXISTS course_summaries AS
+        WITH grade_slots(grade_type, slot) AS (
+            VALUES {_grade_slot_values}
+        ), all_grades AS (
+            SELECT o.id AS offering_id, gs.grade_type, c.count
+            FROM offerings o
+            CROSS JOIN LATERAL unnest(o.grade_counts) WITH ORDINALITY AS c(count, slot)
+            JOIN grade_slots gs ON gs.slot = c.slot
+            UNION ALL
+            -- Grades the vector has no slot for, and every grade of offerings ingested before it existed
+            SELECT g.offering_id, g.grade_type, g.count
+            FROM grades g
+            JOIN offerings o ON o.id = g.offering_id
+            LEFT JOIN grade_slots gs ON gs.grade_type = g.grade_type
+            WHERE o.grade_counts IS NULL OR gs.slot IS NULL
+        ), offering_grades AS (
+            SELECT g.offering_id,
+                   SUM(g.count) AS graded,
+                   SUM(g.count * gp.points) AS points,
+                   SUM(g.count) FILTER (WHERE gp.points IS NOT NULL) AS pointed
+            FROM all_grades g
+            LEFT JOIN (VALUES {_grade_points_values}) AS gp(grade_type, points) ON gp.grade_type = g.grade_type
+            GROUP BY g.offering_id
+        ), latest AS (
+            SELECT DISTINCT ON (course_code) course_code, academic_year, semester, term_key
+            FROM offerings
+            ORDER BY course_code, term_key DESC NULLS LAST, academic_year DESC
+        ), course_instructors AS (
+            SELECT o.course_code, COUNT(DISTINCT oi.instructor_id) AS instructor_count
+            FROM offering_instructors oi JOIN offerings o ON o.id = oi.offering_id
+            GROUP BY o.course_code
+        )
+        SELECT c.code AS course_code,
+               c.name AS course_name,
+               COUNT(o.id)::int AS offering_count,
+               latest.academic_year AS latest_academic_year,
+               latest.semester AS latest_semester,
+               latest.term_key AS latest_term_key,
+               COALESCE(ci.instructor_count, 0)::int AS instructor_count,
+               COALESCE(SUM(og.graded), 0)::int AS students_graded,
+               ROUND((SUM(og.points) / NULLIF(SUM(og.pointed), 0))::numeric, 2) AS mean_grade_point
+        FROM courses c
+        JOIN offerings o ON o.course_code = c.code
+        JOIN latest ON latest.course_code = c.code
+        LEFT JOIN offering_grades og ON og.offering_id = o.id
+        LEFT JOIN course_instructors ci ON ci.course_code = c.code
+        GROUP BY c.code, c.name, latest.academic_year, latest.semester, latest.term_key, ci.instructor_count""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_course_summaries_code ON course_summaries (course_code)",
+]
+
+for _statement in COURSE_SUMMARY_DDL:
+    event.listen(Base.metadata, 'after_create', DDL(_statement))
+# The view depends on the tables, so it has to go before drop_all can drop them
+event.listen(Base.metadata, 'before_drop', DDL("DROP MATERIALIZED VIEW IF EXISTS course_summaries"))
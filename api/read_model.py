@@ -0,0 +1,433 @@
+import asyncio
+import bisect
+import logging
+import os
+import re
+import sqlite3
+import string
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from . import crud, models
+from .cache import GradeCache
+from .instructor_index import instructor_index
+from .snapshot import SnapshotCatalogue, SNAPSHOT_PATH, SNAPSHOT_CHECK_SECONDS
+
+# --- In-Memory Read Model ---
+# The catalogue (courses, instructors, offerings and their grade counts) is small and only changes on
+# ingest, so with READ_MODEL=memory the API loads all of it at startup and serves /search/* and /grades/*
+# without touching Postgres. Offerings live in NumPy arrays (one row per offering, sorted by course and
+# latest term first), instructor links in CSR form, and every repeated string is interned once.
+# When an ingest switches the dataset version (see cache.py), a new catalogue is built in the background
+# and swapped in with a single assignment; requests keep using the old one until then.
+# READ_MODEL=sqlite serves the same endpoints from an exported SQLite snapshot instead (see snapshot.py).
+
+READ_MODEL = os.getenv("READ_MODEL", "postgres").lower()
+
+# ts_rank's default weights for the A and B labels set on Course/Instructor.search_vector
+RANK_WEIGHTS = {'A': 1.0, 'B': 0.4}
+# Sorts NULL term keys first under "latest first", as Postgres does for DESC
+NULL_TERM_KEY = np.iinfo(np.int32).max
+GRADE_COLUMNS = {grade_type: i for i, grade_type in enumerate(models.GRADE_TYPES)}
+
+logger = logging.getLogger(__name__)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def _match_score(words: List[str], tokens: Tuple[Tuple[str, float], ...]) -> float:
+    """Every query word must prefix some token; each contributes the weight of its best one (0 = no match)."""
+    score = 0.0
+    for word in words:
+        best = max((weight for token, weight in tokens if token.startswith(word)), default=0.0)
+        if not best:
+            return 0.0
+        score += best
+    return score
+
+
+@dataclass
+class Catalogue:
+    """One immutable, fully loaded version of the catalogue."""
+    version: Optional[int]
+    loaded_at: float
+
+    # Courses, in code order
+    course_codes: List[str]
+    course_names: List[Optional[str]]
+    course_rows: Dict[str, int]
+    course_codes_lower: List[str]
+    course_names_lower: List[str]
+    course_tokens: List[tuple]
+    # Offerings of course i are rows course_offsets[i]:course_offsets[i + 1]
+    course_offsets: np.ndarray
+
+    # Instructors, in ID order
+    instructor_ids: np.ndarray
+    instructor_names: List[str]
+    instructor_tokens: List[tuple]
+
+    # Offerings: one row each, by course and then latest term first
+    offering_ids: np.ndarray
+    offering_courses: np.ndarray
+    offering_years: np.ndarray # Index into `years`
+    offering_semesters: np.ndarray # Index into `semesters`
+    term_keys: np.ndarray
+    current_registered: np.ndarray # -1 where unknown
+    plot_file_ids: List[Optional[str]]
+    grade_counts: np.ndarray # (offerings, GRADE_TYPES)
+    years: List[str]
+    semesters: List[str]
+    # Offering IDs sorted, and the row of each, for lookups by ID
+    sorted_offering_ids: np.ndarray
+    sorted_offering_rows: np.ndarray
+    # Instructors of offering row r are instructor_refs[instructor_offsets[r]:instructor_offsets[r + 1]]
+    instructor_offsets: np.ndarray
+    instructor_refs: np.ndarray
+    # memory_bytes() at load: /health reports it on every probe, and the catalogue never changes
+    resident_bytes: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        self.resident_bytes = self.memory_bytes()
+
+    # Building blocks for the transient ORM objects the routers and _prepare_grade_report expect
+
+    def _course(self, row: int) -> models.Course:
+        return models.Course(code=self.course_codes[row], name=self.course_names[row])
+
+    def _offering(self, row: int, course: Optional[models.Course] = None) -> models.Offering:
+        refs = self.instructor_refs[self.instructor_offsets[row]:self.instructor_offsets[row + 1]]
+        current_registered = int(self.current_registered[row])
+        return models.Offering(
+            id=int(self.offering_ids[row]),
+            course_code=self.course_codes[self.offering_courses[row]],
+            academic_year=self.years[self.offering_years[row]],
+            semester=self.semesters[self.offering_semesters[row]],
+            current_registered=current_registered if current_registered >= 0 else None,
+            plot_file_id=self.plot_file_ids[row],
+            course=course if course is not None else self._course(int(self.offering_courses[row])),
+            instructors=[models.Instructor(id=int(self.instructor_ids[i]), name=self.instructor_names[i]) for i in refs],
+        )
+
+    # Search, mirroring crud.search_courses / crud.search_all
+
+    def search_courses(self, query: str, limit: int = 25, after_code: Optional[str] = None) -> Tuple[List[models.Course], bool]:
+        canonical = crud.canonicalize_course_code(query)
+        if after_code is None and crud.COURSE_CODE_PATTERN.match(canonical):
+            if canonical in self.course_rows:
+                return [self._course(self.course_rows[canonical])], False
+            if not canonical[-1].isalpha():
+                matches = [canonical + letter for letter in string.ascii_uppercase if canonical + letter in self.course_rows]
+                if len(matches) == 1:
+                    return [self._course(self.course_rows[matches[0]])], False
+
+        needle, code_needle = query.lower(), canonical.lower()
+        start = bisect.bisect_right(self.course_codes, after_code) if after_code is not None else 0
+        found = []
+        for row in range(start, len(self.course_codes)):
+            code = self.course_codes_lower[row]
+            if needle in code or code_needle in code or needle in self.course_names_lower[row]:
+                found.append(row)
+                if len(found) > limit:
+                    break
+        return [self._course(row) for row in found[:limit]], len(found) > limit
+
+    def search_all(self, query: str, limit: int = 25) -> List[dict]:
+        """The unified search. Matches like the prefix tsquery; ranks by summed label weights, approximating ts_rank."""
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        hits = []
+        for row, tokens in enumerate(self.course_tokens):
+            score = _match_score(words, tokens)
+            if score:
+                name = self.course_names[row]
+                hits.append((-score, name is None, name or "", {"type": "course", "code": self.course_codes[row], "id": None, "name": name, "rank": score}))
+        for row, tokens in enumerate(self.instructor_tokens):
+            score = _match_score(words, tokens)
+            if score:
+                name = self.instructor_names[row]
+                hits.append((-score, False, name, {"type": "instructor", "code": None, "id": int(self.instructor_ids[row]), "name": name, "rank": score}))
+        hits.sort(key=lambda hit: hit[:3])
+        return [hit[3] for hit in hits[:limit]]
+
+    # Offerings and grades, mirroring the crud functions of the same names
+
+    def get_offering_by_details(self, course_code: str, academic_year: str, semester: str) -> Optional[models.Offering]:
+        course_row = self.course_rows.get(course_code)
+        if course_row is None:
+            return None
+        for row in range(self.course_offsets[course_row], self.course_offsets[course_row + 1]):
+            if self.years[self.offering_years[row]] == academic_year and self.semesters[self.offering_semesters[row]] == semester:
+                return self._offering(row)
+        return None
+
+    def get_terms_for_course(self, course_code: str, from_year: Optional[int] = None, to_year: Optional[int] = None) -> List[models.Offering]:
+        course_row = self.course_rows.get(course_code.upper())
+        if course_row is None:
+            return []
+        rows = np.arange(self.course_offsets[course_row], self.course_offsets[course_row + 1])
+        if from_year is not None:
+            rows = rows[(self.term_keys[rows] >= from_year * 10) & (self.term_keys[rows] != NULL_TERM_KEY)]
+        if to_year is not None:
+            rows = rows[self.term_keys[rows] < (to_year + 1) * 10]
+        course = self._course(course_row)
+        return [self._offering(int(row), course) for row in rows]
+
+    def get_grades_for_offering(self, offering_id: int) -> Tuple[Optional[models.Offering], List[models.Grade]]:
+        i = int(np.searchsorted(self.sorted_offering_ids, offering_id))
+        if i == len(self.sorted_offering_ids) or self.sorted_offering_ids[i] != offering_id:
+            return None, []
+        row = int(self.sorted_offering_rows[i])
+        grades = [
+            models.Grade(offering_id=offering_id, grade_type=grade_type, count=int(count))
+            for grade_type, count in zip(models.GRADE_TYPES, self.grade_counts[row]) if count
+        ]
+        return self._offering(row), grades
+
+    # Footprint
+
+    def memory_bytes(self) -> int:
+        """Approximate resident size: array buffers, plus every distinct string and container counted once."""
+        seen = set()
+
+        def size(obj) -> int:
+            if obj is None or id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            if isinstance(obj, np.ndarray):
+                return obj.nbytes
+            total = sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                total += sum(size(k) + size(v) for k, v in obj.items())
+            elif isinstance(obj, (list, tuple)):
+                total += sum(size(item) for item in obj)
+            return total
+
+        return sum(size(value) for value in vars(self).values())
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "courses": len(self.course_codes),
+            "instructors": len(self.instructor_names),
+            "offerings": len(self.offering_ids),
+            "memory_mb": round(self.resident_bytes / 2**20, 1),
+        }
+
+
+def build_catalogue(version: Optional[int], courses: list, instructors: list, offerings: list, links: list, legacy_grades: list) -> Catalogue:
+    """Assembles a Catalogue from plain rows (see ReadModel.load for their shape). CPU-bound; runs off the event loop."""
+    # Courses
+    names_by_code = {code: name for code, name in courses}
+    course_codes = sorted(sys.intern(code) for code in names_by_code)
+    course_names = [_intern(names_by_code[code]) for code in course_codes]
+    course_rows = {code: row for row, code in enumerate(course_codes)}
+    course_tokens = [
+        tuple([(code.lower(), RANK_WEIGHTS['A'])] + [(sys.intern(word), RANK_WEIGHTS['B']) for word in re.findall(r"\w+", (name or "").lower())])
+        for code, name in zip(course_codes, course_names)
+    ]
+
+    # Instructors
+    instructors = sorted(instructors)
+    instructor_ids = np.array([instructor_id for instructor_id, _ in instructors], dtype=np.int64)
+    instructor_names = [sys.intern(name) for _, name in instructors]
+    instructor_rows = {int(instructor_id): row for row, instructor_id in enumerate(instructor_ids)}
+    instructor_tokens = [tuple((sys.intern(word), RANK_WEIGHTS['A']) for word in re.findall(r"\w+", name.lower())) for name in instructor_names]
+
+    # Offerings, in the order of their source rows first; years and semesters become small integer codes
+    n = len(offerings)
+    years, semesters = {}, {}
+    ids = np.fromiter((o[0] for o in offerings), dtype=np.int64, count=n)
+    course_of = np.fromiter((course_rows[o[1]] for o in offerings), dtype=np.int32, count=n)
+    year_of = np.fromiter((years.setdefault(o[2], len(years)) for o in offerings), dtype=np.int16, count=n)
+    semester_of = np.fromiter((semesters.setdefault(o[3], len(semesters)) for o in offerings), dtype=np.int8, count=n)
+    term_of = np.fromiter((NULL_TERM_KEY if o[4] is None else o[4] for o in offerings), dtype=np.int32, count=n)
+    registered_of = np.fromiter((-1 if o[5] is None else o[5] for o in offerings), dtype=np.int32, count=n)
+    plot_of = [_intern(o[6]) for o in offerings]
+    counts = np.zeros((n, len(models.GRADE_TYPES)), dtype=np.int32)
+    for source_row, offering in enumerate(offerings):
+        if offering[7] is not None:
+            counts[source_row, :len(offering[7])] = offering[7]
+
+    # Offerings ingested before the grade vector existed: fill it from the grades table
+    source_row_of = {int(offering_id): source_row for source_row, offering_id in enumerate(ids)}
+    for offering_id, grade_type, count in legacy_grades:
+        if grade_type in GRADE_COLUMNS:
+            counts[source_row_of[offering_id], GRADE_COLUMNS[grade_type]] += int(round(count))
+
+    # By course, then latest term first (NULL terms first, as in Postgres), then ID
+    order = np.lexsort((ids, -term_of.astype(np.int64), course_of))
+    ids, course_of, year_of, semester_of = ids[order], course_of[order], year_of[order], semester_of[order]
+    term_of, registered_of, counts = term_of[order], registered_of[order], counts[order]
+    plot_of = [plot_of[i] for i in order]
+    course_offsets = np.searchsorted(course_of, np.arange(len(course_codes) + 1)).astype(np.int32)
+
+    id_order = np.argsort(ids)
+    row_of_id = {int(offering_id): row for row, offering_id in enumerate(ids)}
+
+    # Instructor links in CSR form, each offering's instructors by name
+    name_rank = np.empty(len(instructor_names), dtype=np.int32)
+    name_rank[np.argsort(np.array(instructor_names, dtype=object))] = np.arange(len(instructor_names), dtype=np.int32)
+    link_rows = np.fromiter((row_of_id[offering_id] for offering_id, _ in links), dtype=np.int32, count=len(links))
+    link_refs = np.fromiter((instructor_rows[instructor_id] for _, instructor_id in links), dtype=np.int32, count=len(links))
+    link_order = np.lexsort((name_rank[link_refs], link_rows))
+    link_rows, link_refs = link_rows[link_order], link_refs[link_order]
+    instructor_offsets = np.searchsorted(link_rows, np.arange(n + 1)).astype(np.int32)
+
+    return Catalogue(
+        version=version,
+        loaded_at=time.time(),
+        course_codes=course_codes,
+        course_names=course_names,
+        course_rows=course_rows,
+        course_codes_lower=[code.lower() for code in course_codes],
+        course_names_lower=[(name or "").lower() for name in course_names],
+        course_tokens=course_tokens,
+        course_offsets=course_offsets,
+        instructor_ids=instructor_ids,
+        instructor_names=instructor_names,
+        instructor_tokens=instructor_tokens,
+        offering_ids=ids,
+        offering_courses=course_of,
+        offering_years=year_of,
+        offering_semesters=semester_of,
+        term_keys=term_of,
+        current_registered=registered_of,
+        plot_file_ids=plot_of,
+        grade_counts=counts,
+        years=[sys.intern(year) for year in years],
+        semesters=[sys.intern(semester) for semester in semesters],
+        sorted_offering_ids=ids[id_order],
+        sorted_offering_rows=id_order.astype(np.int32),
+        instructor_offsets=instructor_offsets,
+        instructor_refs=link_refs,
+    )
+
+
+async def fetch_catalogue_rows(session_factory) -> tuple:
+    """The plain rows build_catalogue takes, read from the database in one session."""
+    async with session_factory() as db:
+        courses = (await db.execute(select(models.Course.code, models.Course.name))).all()
+        instructors = (await db.execute(select(models.Instructor.id, models.Instructor.name))).all()
+        offerings = (await db.execute(select(
+            models.Offering.id, models.Offering.course_code, models.Offering.academic_year, models.Offering.semester,
+            models.Offering.term_key, models.Offering.current_registered, models.Offering.plot_file_id,
+            models.Offering.grade_counts,
+        ))).all()
+        links = (await db.execute(select(
+            models.offering_instructor_association.c.offering_id, models.offering_instructor_association.c.instructor_id
+        ))).all()
+        legacy_grades = (await db.execute(
+            select(models.Grade.offering_id, models.Grade.grade_type, models.Grade.count)
+            .join(models.Offering).where(models.Offering.grade_counts.is_(None))
+        )).all()
+    return courses, instructors, offerings, links, legacy_grades
+
+
+class ReadModel:
+    """
+    Holds the live catalogue and replaces it when the data changes: with READ_MODEL=memory a Catalogue
+    built from Postgres, reloaded after each ingest; with READ_MODEL=sqlite a SnapshotCatalogue,
+    reopened whenever the snapshot file is replaced.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.enabled = mode in ("memory", "sqlite")
+        self.catalogue: Optional[Union[Catalogue, SnapshotCatalogue]] = None
+        self._reload_task: Optional[asyncio.Task] = None
+        self._snapshot_checked_at = 0.0
+
+    async def load(self, session_factory, version: Optional[int] = None) -> Union[Catalogue, SnapshotCatalogue]:
+        """Reads the whole catalogue and swaps it in. The instructor index is rebuilt from the same rows."""
+        if self.mode == "sqlite":
+            return self._open_snapshot()
+
+        started = time.perf_counter()
+        rows = await fetch_catalogue_rows(session_factory)
+        catalogue = await asyncio.to_thread(build_catalogue, version, *rows)
+        self.catalogue = catalogue
+        instructor_index.build([tuple(row) for row in rows[1]], version)
+        stats = catalogue.stats()
+        logger.info(
+            f"Read model loaded: version {version}, {stats['courses']:,} courses, {stats['instructors']:,} instructors, "
+            f"{stats['offerings']:,} offerings, {stats['memory_mb']} MB, in {time.perf_counter() - started:.2f}s."
+        )
+        return catalogue
+
+    def _open_snapshot(self) -> SnapshotCatalogue:
+        catalogue = SnapshotCatalogue(SNAPSHOT_PATH)
+        self.catalogue = catalogue
+        instructor_index.build(catalogue.instructor_rows(), catalogue.version)
+        stats = catalogue.stats()
+        logger.info(
+            f"Read model opened {SNAPSHOT_PATH}: version {stats['version']} exported {stats['exported_at']}, "
+            f"{stats['offerings']:,} offerings, {stats['file_mb']} MB mapped."
+        )
+        return catalogue
+
+    def _check_snapshot(self) -> None:
+        """Reopens the snapshot if the file has been replaced since it was opened."""
+        if time.monotonic() - self._snapshot_checked_at < SNAPSHOT_CHECK_SECONDS:
+            return
+        self._snapshot_checked_at = time.monotonic()
+        try:
+            stat = os.stat(SNAPSHOT_PATH)
+        except OSError:
+            return # Mid-replacement, or removed: keep serving the open file
+        if (stat.st_ino, stat.st_mtime_ns) != self.catalogue.file_id:
+            try:
+                self._open_snapshot()
+            except (sqlite3.Error, ValueError, KeyError) as e:
+                logger.error(f"Could not open the new snapshot, still serving version {self.catalogue.version}: {e}")
+
+    async def _reload(self, session_factory, version: int) -> None:
+        try:
+            await self.load(session_factory, version)
+        except Exception as e:
+            logger.error(f"Read model reload to version {version} failed, still serving version {self.catalogue.version}: {e}")
+        finally:
+            self._reload_task = None
+
+    async def current(self, session_factory, cache: GradeCache) -> Optional[Union[Catalogue, SnapshotCatalogue]]:
+        """
+        The catalogue to serve this request from, or None to use the database.
+        If an ingest has switched the dataset version, a reload starts in the background;
+        the current catalogue keeps serving until it completes. Pass the primary's session factory.
+        """
+        catalogue = self.catalogue
+        if catalogue is None:
+            return None
+        if self.mode == "sqlite":
+            self._check_snapshot()
+            return self.catalogue
+        if cache.enabled and self._reload_task is None:
+            try:
+                version = await cache.version()
+            except RedisError as e:
+                logger.warning(f"Could not read the dataset version: {e}")
+                return catalogue
+            if version != catalogue.version:
+                self._reload_task = asyncio.create_task(self._reload(session_factory, version))
+        return catalogue
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"mode": self.mode}
+        stats = {"mode": self.mode, "loaded": self.catalogue is not None, "reloading": self._reload_task is not None}
+        if self.catalogue is not None:
+            stats.update(self.catalogue.stats())
+        return stats
+
+
+# Shared by the API process; loaded in main.py's lifespan
+read_model = ReadModel(READ_MODEL)
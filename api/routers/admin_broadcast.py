@@ -1,8 +1,12 @@
 import logging
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from .. import crud, schemas
+from ..database import get_primary_db
 from ..tasks import send_broadcast_message
-from ..schemas import BroadcastMessageRequest # Assuming you create this schema
+from ..schemas import BroadcastMessageRequest
 
 # This router handles sending broadcast messages to all users.
 # It should be protected by an admin-only API key in production.
@@ -17,15 +21,19 @@ logger = logging.getLogger(__name__)
 @router.post("/", status_code=status.HTTP_202_ACCEPTED)
 async def enqueue_broadcast(broadcast_data: BroadcastMessageRequest):
     """
-    Accepts a message from an admin and queues it for broadcasting to all users.
+    Accepts a message from an admin and queues it for broadcasting to all users,
+    or only to the segment described by the optional audience filters.
     
     This endpoint returns immediately with a task ID, while the actual messages
     are sent in the background by a Celery worker.
     """
     logger.info(f"Admin request to enqueue broadcast: '{broadcast_data.message_text[:50]}...'")
     try:
-        # .delay() sends the task to the Celery queue
-        task = send_broadcast_message.delay(broadcast_data.message_text)
+        # .delay() sends the task to the Celery queue.
+        # The audience is dumped in JSON mode so datetimes survive Celery's JSON serializer.
+        audience = broadcast_data.audience.model_dump(mode="json", exclude_none=True) if broadcast_data.audience else None
+        media = broadcast_data.media.model_dump() if broadcast_data.media else None
+        task = send_broadcast_message.delay(broadcast_data.message_text, audience, media)
         logger.info(f"Broadcast message enqueued. Celery Task ID: {task.id}")
         return {"message": "Broadcast task successfully queued.", "task_id": task.id}
     except Exception as e:
@@ -33,4 +41,46 @@ async def enqueue_broadcast(broadcast_data: BroadcastMessageRequest):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to connect to the message broker."
-        )
\ No newline at end of file
+        )
+
+@router.post("/scheduled", response_model=schemas.ScheduledBroadcast, status_code=status.HTTP_201_CREATED)
+async def schedule_broadcast(
+    broadcast_data: schemas.ScheduledBroadcastCreate,
+    db: AsyncSession = Depends(get_primary_db)
+):
+    """
+    Queues a broadcast for a future time, optionally repeating on an interval.
+    
+    The Celery beat dispatcher picks it up shortly before `send_at`, so heavy sends
+    can be placed in off-peak windows.
+    """
+    logger.info(f"Admin request to schedule broadcast at {broadcast_data.send_at}: '{broadcast_data.message_text[:50]}...'")
+    return await crud.create_scheduled_broadcast(db, broadcast_data=broadcast_data)
+
+@router.get("/scheduled", response_model=List[schemas.ScheduledBroadcast])
+async def list_scheduled_broadcasts(
+    include_inactive: bool = False,
+    db: AsyncSession = Depends(get_primary_db)
+):
+    """Lists scheduled broadcasts, soonest first."""
+    return await crud.get_scheduled_broadcasts(db, include_inactive=include_inactive)
+
+@router.delete("/scheduled/{broadcast_id}", response_model=schemas.ScheduledBroadcast)
+async def cancel_scheduled_broadcast(
+    broadcast_id: int,
+    db: AsyncSession = Depends(get_primary_db)
+):
+    """
+    Cancels a scheduled broadcast before it is dispatched.
+    A one-off that has already been queued can't be called back, so that is a 409.
+    """
+    scheduled = await crud.cancel_scheduled_broadcast(db, broadcast_id=broadcast_id)
+    if not scheduled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scheduled broadcast not found.")
+    if scheduled.status != 'cancelled':
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Scheduled broadcast is already {scheduled.status} and can no longer be cancelled."
+        )
+    logger.info(f"Admin action: Scheduled broadcast {broadcast_id} cancelled.")
+    return scheduled
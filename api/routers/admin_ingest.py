@@ -0,0 +1,56 @@
+import logging
+from celery.result import AsyncResult
+from fastapi import APIRouter, HTTPException, status
+
+from .. import schemas
+from ..celery_app import app as celery_app
+from ..tasks import ingest_grade_directory, INGEST_WATCH_DIR
+from ..utils.paths import resolve_inside
+
+# This router lets admins load new grade sheets through the Celery ingest worker.
+# It should be protected by an admin-only API key in production.
+router = APIRouter(
+    prefix="/admin/ingest",
+    tags=["Admin - Ingest"],
+    # dependencies=[Depends(get_admin_api_key)], # TODO: Implement and enable security
+)
+
+logger = logging.getLogger(__name__)
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_directory_ingest(ingest_data: schemas.IngestDirectoryRequest):
+    """
+    Queues an ingest of every grade sheet in the ingest directory (or a folder inside it).
+    Files that were already ingested are skipped by checksum.
+    
+    Returns a task ID right away; poll `GET /admin/ingest/{task_id}` for progress.
+    """
+    # Only folders inside the ingest directory can be requested
+    directory = resolve_inside(INGEST_WATCH_DIR, ingest_data.subdirectory or "")
+    if directory is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Directory must be inside the ingest directory.")
+
+    logger.info(f"Admin request to ingest grade sheets from {directory}")
+    try:
+        task = ingest_grade_directory.delay(directory, ingest_data.concurrency)
+        logger.info(f"Directory ingest enqueued. Celery Task ID: {task.id}")
+        return {"message": "Ingest task successfully queued.", "task_id": task.id}
+    except Exception as e:
+        logger.error(f"Failed to enqueue ingest task: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to connect to the message broker."
+        )
+
+@router.get("/{task_id}", response_model=schemas.IngestTaskStatus)
+async def get_ingest_status(task_id: str):
+    """
+    Reports an ingest task's state (PENDING, PROGRESS, SUCCESS or FAILURE).
+    While running, `progress` holds the files found, ingested, skipped and failed so far.
+    """
+    result = AsyncResult(task_id, app=celery_app)
+    if result.state == "FAILURE":
+        progress = {"error": str(result.result)}
+    else:
+        progress = result.info if isinstance(result.info, dict) else None
+    return schemas.IngestTaskStatus(task_id=task_id, state=result.state, progress=progress)
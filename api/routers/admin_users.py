@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import crud, schemas
-from ..database import get_db
+from ..database import get_primary_db
 # from ..security import get_admin_api_key # TODO: Implement and enable API key security
 
 # This router contains endpoints for administrative actions on users.
@@ -20,7 +20,7 @@ logger = logging.getLogger(__name__)
 @router.get("/{user_identifier}", response_model=schemas.User)
 async def get_user_by_admin(
     user_identifier: str, 
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_primary_db)
 ):
     """Fetches a single user's complete profile by their Telegram ID or username."""
     db_user = await crud.get_user_by_identifier(db, identifier=user_identifier)
@@ -32,7 +32,7 @@ async def get_user_by_admin(
 async def block_or_unblock_user(
     user_identifier: str,
     block_update: schemas.UserBlockUpdate, # Request body with block status
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_primary_db)
 ):
     """Blocks or unblocks a user and records the reason if applicable."""
     logger.info(f"Admin action: Updating block status for '{user_identifier}' to {block_update.is_blocked}.")
@@ -0,0 +1,30 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Path
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud, schemas
+from ..database import get_db
+
+# This router handles course-level views that span all of a course's offerings.
+router = APIRouter(
+    prefix="/courses",
+    tags=["Courses"],
+)
+
+logger = logging.getLogger(__name__)
+
+@router.get("/{course_code}/summary", response_model=schemas.CourseSummary)
+async def get_course_summary(
+    course_code: str = Path(..., description="Course code, e.g., CS201A"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Gets a course's overview: latest term, number of offerings, distinct instructors,
+    total students graded and mean grade point.
+    
+    Served from a materialized view refreshed after every ingest, so it is a single indexed row.
+    """
+    summary = await crud.get_course_summary(db, course_code=course_code)
+    if not summary:
+        raise HTTPException(status_code=404, detail=f"No summary found for course {course_code}")
+    return summary
@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from .. import crud, schemas
-from ..database import get_db
+from ..database import get_primary_db
 
 # This router handles all feedback submissions from users.
 router = APIRouter(
@@ -14,7 +14,7 @@ router = APIRouter(
 @router.post("/", response_model=schemas.Feedback, status_code=status.HTTP_201_CREATED)
 async def submit_feedback(
     feedback_data: schemas.FeedbackCreate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_primary_db)
 ):
     """
     Accepts and stores a new feedback submission from a user.
@@ -1,10 +1,12 @@
 import logging
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Path, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import crud, schemas, models
-from ..database import get_db
+from ..cache import grade_cache, terms_payload
+from ..database import get_db, AsyncSessionFactory
+from ..read_model import read_model
 
 # This router handles fetching course offerings and grade distributions.
 router = APIRouter(
@@ -57,7 +59,11 @@ async def get_offering_details(
     db: AsyncSession = Depends(get_db)
 ):
     """Fetches the detailed information for a single course offering."""
-    offering = await crud.get_offering_by_details(db, course_code, academic_year, semester)
+    catalogue = await read_model.current(AsyncSessionFactory, grade_cache)
+    if catalogue is not None:
+        offering = catalogue.get_offering_by_details(course_code, academic_year, semester)
+    else:
+        offering = await crud.get_offering_by_details(db, course_code, academic_year, semester)
     if not offering:
         raise HTTPException(status_code=404, detail="Offering not found.")
     return offering
@@ -65,13 +71,35 @@ async def get_offering_details(
 @router.get("/offering/by_course/{course_code}", response_model=List[schemas.OfferingForCourseResult])
 async def list_offerings_for_course(
     course_code: str = Path(..., description="Course code, e.g., CS201A"),
+    from_year: Optional[int] = Query(None, description="Only academic years starting in or after this year, e.g., 2019"),
+    to_year: Optional[int] = Query(None, description="Only academic years starting in or before this year, e.g., 2023"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Lists all available terms (offerings) for a given course."""
-    offerings = await crud.get_terms_for_course(db=db, course_code=course_code)
-    if not offerings:
-        raise HTTPException(status_code=404, detail=f"No offerings found for course {course_code}")
-    return offerings
+    """Lists the terms (offerings) of a given course, latest first, optionally within a range of years."""
+    catalogue = await read_model.current(AsyncSessionFactory, grade_cache)
+    if catalogue is not None:
+        # Served from memory, so there's nothing to cache
+        offerings = catalogue.get_terms_for_course(course_code, from_year=from_year, to_year=to_year)
+        if not offerings:
+            raise HTTPException(status_code=404, detail=f"No offerings found for course {course_code}")
+        return offerings
+
+    if from_year is not None or to_year is not None:
+        # Year ranges are cheap index range scans, so only the full list is cached
+        offerings = await crud.get_terms_for_course(db=db, course_code=course_code, from_year=from_year, to_year=to_year)
+        if not offerings:
+            raise HTTPException(status_code=404, detail=f"No offerings found for course {course_code} in that range")
+        return offerings
+
+    terms = await grade_cache.get_terms(course_code)
+    if terms is None:
+        offerings = await crud.get_terms_for_course(db=db, course_code=course_code)
+        if not offerings:
+            raise HTTPException(status_code=404, detail=f"No offerings found for course {course_code}")
+        terms = terms_payload(offerings)
+        await grade_cache.set_terms(course_code, terms)
+    await grade_cache.count_terms_view(course_code)
+    return terms
 
 @router.get("/offering/{offering_id}", response_model=schemas.GradeReport)
 async def get_grade_distribution(
@@ -81,9 +109,21 @@ async def get_grade_distribution(
     """
     Gets the full grade distribution for a specific offering, including calculated percentages.
     """
-    offering, grades = await crud.get_grades_for_offering(db=db, offering_id=offering_id)
-    if not offering:
-        raise HTTPException(status_code=404, detail=f"Offering with ID {offering_id} not found.")
+    catalogue = await read_model.current(AsyncSessionFactory, grade_cache)
+    if catalogue is not None:
+        offering, grades = catalogue.get_grades_for_offering(offering_id)
+        if not offering:
+            raise HTTPException(status_code=404, detail=f"Offering with ID {offering_id} not found.")
+        return _prepare_grade_report(offering, grades)
 
-    
-    return _prepare_grade_report(offering, grades)
\ No newline at end of file
+    report = await grade_cache.get_report(offering_id)
+    if report is None:
+        offering, grades = await crud.get_grades_for_offering(db=db, offering_id=offering_id)
+        if not offering:
+            raise HTTPException(status_code=404, detail=f"Offering with ID {offering_id} not found.")
+
+        report = _prepare_grade_report(offering, grades)
+        await grade_cache.set_report(offering_id, report)
+    # Counted by (course, year, semester), so the popular list survives reloads that renumber offerings
+    await grade_cache.count_report_view(report)
+    return report
\ No newline at end of file
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from .. import crud, schemas
-from ..database import get_db
+from ..cache import grade_cache
+from ..instructor_index import instructor_index
+from ..read_model import read_model
+from ..database import get_db, AsyncSessionFactory
 from ..utils.limiter import limiter
+from ..utils.pagination import encode_cursor, decode_cursor
 
 # This router handles all search-related endpoints.
 router = APIRouter(
@@ -12,35 +16,103 @@ router = APIRouter(
     tags=["Search"],
 )
 
-@router.get("/course", response_model=List[schemas.Course])
+@router.get("", response_model=List[schemas.SearchResult])
+@limiter.limit("15/minute")
+async def search_everything(
+    request: Request,
+    q: str = Query(..., min_length=2, description="Search query for a course code or title, or an instructor's name."),
+    limit: int = Query(25, ge=1, le=50, description="Maximum number of results."),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Searches courses and instructors in a single round trip.
+    
+    Returns one merged list, ranked by full-text relevance, where each result is typed
+    as a `course` (with its `code`) or an `instructor` (with its `id`).
+    """
+    catalogue = await read_model.current(AsyncSessionFactory, grade_cache)
+    if catalogue is not None:
+        results = catalogue.search_all(q, limit=limit)
+    else:
+        results = await crud.search_all(db, query=q, limit=limit)
+    if not results:
+        raise HTTPException(status_code=404, detail="Nothing found matching the query.")
+    return results
+
+@router.get("/course", response_model=schemas.CourseSearchPage)
 @limiter.limit("15/minute")
 async def search_for_courses(
     request: Request,
     q: str = Query(..., min_length=2, description="Search query for course code or name."),
+    limit: int = Query(25, ge=1, le=50, description="Maximum number of results per page."),
+    cursor: Optional[str] = Query(None, description="The `next_cursor` of the previous page."),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Searches for courses by their code or title based on a query string.
+
+    Results come a page at a time, ordered by course code; `next_cursor` is set while more remain.
     """
-    courses = await crud.search_courses(db, query=q)
-    if not courses:
+    try:
+        after_code = decode_cursor(cursor, "code") if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    catalogue = await read_model.current(AsyncSessionFactory, grade_cache)
+    if catalogue is not None:
+        courses, has_more = catalogue.search_courses(q, limit=limit, after_code=after_code)
+    else:
+        courses, has_more = await crud.search_courses(db, query=q, limit=limit, after_code=after_code)
+    if not courses and cursor is None:
         raise HTTPException(status_code=404, detail="No courses found matching the query.")
-    
-    # FastAPI automatically converts the list of database objects to a list of Pydantic schemas.
-    return courses
 
-@router.get("/prof", response_model=List[schemas.Instructor])
+    next_cursor = encode_cursor({"code": courses[-1].code}) if has_more else None
+    return schemas.CourseSearchPage(items=courses, next_cursor=next_cursor)
+
+@router.get("/prof", response_model=schemas.InstructorSearchPage)
 @limiter.limit("15/minute")
 async def search_for_instructors(
     request: Request,
     q: str = Query(..., min_length=3, description="Search query for an instructor's name."),
+    limit: int = Query(25, ge=1, le=50, description="Maximum number of results per page."),
+    cursor: Optional[str] = Query(None, description="The `next_cursor` of the previous page."),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Searches for instructors by their name.
+    Searches for instructors by their name, tolerating a few typos per word.
+
+    Results come a page at a time, closest match first; `next_cursor` is set while more remain.
     """
-    instructors = await crud.search_instructors(db, query=q)
-    if not instructors:
+    if instructor_index.ready:
+        if read_model.enabled:
+            # The read model rebuilds the index along with the rest of the catalogue
+            await read_model.current(AsyncSessionFactory, grade_cache)
+        else:
+            await instructor_index.refresh_if_stale(AsyncSessionFactory, grade_cache)
+        try:
+            offset = decode_cursor(cursor, "offset", int) if cursor else 0
+            if offset < 0:
+                raise ValueError("Negative offset.")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+        # Ranked matches aren't in key order, so the index's cursor is a position in its ranking
+        matches = instructor_index.search(q, limit=offset + limit + 1)
+        if not matches and cursor is None:
+            raise HTTPException(status_code=404, detail="No instructors found matching the query.")
+        items = [schemas.Instructor(id=instructor_id, name=name) for instructor_id, name in matches[offset:offset + limit]]
+        next_cursor = encode_cursor({"offset": offset + limit}) if len(matches) > offset + limit else None
+        return schemas.InstructorSearchPage(items=items, next_cursor=next_cursor)
+
+    # No index in this process (e.g. it failed to build at startup): exact substring search in SQL
+    try:
+        after_name = decode_cursor(cursor, "name") if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    instructors, has_more = await crud.search_instructors(db, query=q, limit=limit, after_name=after_name)
+    if not instructors and cursor is None:
         raise HTTPException(status_code=404, detail="No instructors found matching the query.")
 
-    return instructors
\ No newline at end of file
+    next_cursor = encode_cursor({"name": instructors[-1].name}) if has_more else None
+    return schemas.InstructorSearchPage(items=instructors, next_cursor=next_cursor)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import crud, schemas, models
-from ..database import get_db
+from ..database import get_primary_db
 
 # This router handles all user-related operations like subscribing and unsubscribing.
 router = APIRouter(
@@ -13,7 +13,7 @@ router = APIRouter(
 @router.post("/subscribe", response_model=schemas.User)
 async def subscribe_or_update_user(
     user_data: schemas.UserCreate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_primary_db)
 ):
     """
     Creates a new user or updates an existing user's details.
@@ -26,7 +26,7 @@ async def subscribe_or_update_user(
 @router.post("/{telegram_user_id}/unsubscribe", response_model=schemas.User)
 async def unsubscribe_user(
     telegram_user_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_primary_db)
 ):
     """Marks a specific user as unsubscribed in the database."""
     # Fetch the user by their primary key.
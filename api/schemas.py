@@ -1,7 +1,12 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, AwareDatetime, field_validator, model_validator
+from typing import List, Optional, Literal
 import datetime
 
+from .utils.paths import BROADCAST_MEDIA_DIR, TELEGRAM_FILE_ID_PATTERN, resolve_inside, is_url
+
+# Telegram's limit on a photo or document caption (a plain message may be 4096 characters)
+TELEGRAM_CAPTION_LIMIT = 1024
+
 # Base Config 
 # By creating a base model with this config, we don't have to repeat it in every schema.
 class OrmBaseModel(BaseModel):
@@ -30,6 +35,17 @@ class Offering(OrmBaseModel):
     instructors: List[Instructor] = []
     plot_file_id: Optional[str] = None
 
+class CourseSummary(OrmBaseModel):
+    """A one-row overview of a course across all of its offerings."""
+    course_code: str
+    course_name: Optional[str] = None
+    offering_count: int
+    latest_academic_year: Optional[str] = None
+    latest_semester: Optional[str] = None
+    instructor_count: int
+    students_graded: int
+    mean_grade_point: Optional[float] = None
+
 class OfferingForCourseResult(OrmBaseModel):
     """A simplified offering view for listing all terms of a single course."""
     academic_year: str
@@ -47,6 +63,25 @@ class GradeReport(OrmBaseModel):
     grades: List[Grade] = []
     total_graded_students: int
 
+# Search Schemas
+class SearchResult(BaseModel):
+    """One ranked hit from the unified search: a course (by code) or an instructor (by id)."""
+    type: Literal["course", "instructor"]
+    code: Optional[str] = None
+    id: Optional[int] = None
+    name: Optional[str] = None
+    rank: float
+
+class CourseSearchPage(BaseModel):
+    """One page of course search results; pass `next_cursor` back as `cursor` for the next page."""
+    items: List[Course]
+    next_cursor: Optional[str] = None
+
+class InstructorSearchPage(BaseModel):
+    """One page of instructor search results; pass `next_cursor` back as `cursor` for the next page."""
+    items: List[Instructor]
+    next_cursor: Optional[str] = None
+
 # User Schemas
 class UserBase(OrmBaseModel):
     """Base user schema with fields common to creation and reading."""
@@ -80,4 +115,71 @@ class Feedback(FeedbackCreate, OrmBaseModel):
     """Schema for reading feedback entries from the database."""
     id: int
     submitted_at: datetime.datetime
-    status: str
\ No newline at end of file
+    status: str
+
+# Broadcast Schemas
+class BroadcastAudience(BaseModel):
+    """Optional filters that narrow a broadcast down to a segment of subscribed users."""
+    active_within_days: Optional[int] = Field(None, gt=0, description="Only users active in the last N days.")
+    subscribed_since: Optional[AwareDatetime] = Field(None, description="Only users who subscribed on or after this time, with a UTC offset.")
+    user_ids: Optional[List[int]] = Field(None, min_length=1, description="Only these Telegram user IDs.")
+
+class BroadcastMedia(BaseModel):
+    """A photo or document sent with a broadcast; the message text becomes its caption."""
+    media_type: Literal["photo", "document"]
+    source: str = Field(..., description="A URL, an existing Telegram file_id, or a file inside the worker's media directory.")
+
+class BroadcastMediaCreate(BroadcastMedia):
+    """Broadcast media as submitted by an admin; the source is checked before anything is queued."""
+
+    @field_validator("source")
+    @classmethod
+    def source_is_url_file_id_or_media_file(cls, source: str) -> str:
+        if is_url(source) or TELEGRAM_FILE_ID_PATTERN.match(source):
+            return source
+        # Local files only from the media directory: anything else could make the worker upload
+        # one of its own files (e.g. .env) to every user. The file itself lives on the worker.
+        if resolve_inside(BROADCAST_MEDIA_DIR, source) is None:
+            raise ValueError("Must be an http(s) URL, a Telegram file_id, or a file inside the media directory.")
+        return source
+
+class BroadcastMessageRequest(BaseModel):
+    """Schema for the request body when an admin queues a broadcast."""
+    message_text: str
+    audience: Optional[BroadcastAudience] = None
+    media: Optional[BroadcastMediaCreate] = None
+
+    @model_validator(mode="after")
+    def caption_fits(self):
+        # With media, the text is sent as its caption, which Telegram caps much lower than a message
+        if self.media is not None and len(self.message_text) > TELEGRAM_CAPTION_LIMIT:
+            raise ValueError(f"message_text is sent as the media caption and must be at most {TELEGRAM_CAPTION_LIMIT} characters.")
+        return self
+
+class ScheduledBroadcastCreate(BroadcastMessageRequest):
+    """Schema for queueing a broadcast to be sent at a future time."""
+    send_at: AwareDatetime = Field(..., description="When to send, with a UTC offset, e.g. 2025-07-01T09:00:00+05:30.")
+    repeat_every_minutes: Optional[int] = Field(None, gt=0, description="Resend on this interval; omit for a one-off.")
+
+class ScheduledBroadcast(OrmBaseModel):
+    """Schema for reading scheduled broadcasts."""
+    id: int
+    message_text: str
+    audience: Optional[BroadcastAudience] = None
+    media: Optional[BroadcastMedia] = None
+    send_at: datetime.datetime
+    repeat_every_minutes: Optional[int] = None
+    status: str
+    last_task_id: Optional[str] = None
+    last_queued_at: Optional[datetime.datetime] = None
+
+class IngestDirectoryRequest(BaseModel):
+    """Schema for the request body when an admin triggers a directory ingest."""
+    subdirectory: Optional[str] = Field(None, description="A folder inside the ingest directory; omit to ingest the whole directory.")
+    concurrency: int = Field(4, ge=1, le=16, description="How many files are read and merged at the same time.")
+
+class IngestTaskStatus(BaseModel):
+    """Schema for the state and progress of a directory ingest task."""
+    task_id: str
+    state: str
+    progress: Optional[dict] = None
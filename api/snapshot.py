@@ -0,0 +1,254 @@
+import json
+import os
+import re
+import sqlite3
+import string
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from . import crud, models
+
+# --- SQLite Catalogue Snapshot ---
+# scripts/export_snapshot.py writes the grade catalogue to a single read-only SQLite file, indexed
+# for exactly the queries the API makes. With READ_MODEL=sqlite the API serves /search/* and /grades/*
+# from that file through memory-mapped I/O, with no Postgres at all (staging, demos, load tests, or a
+# replica shipped next to the bot). Replacing the file (the exporter renames it into place) is picked
+# up within SNAPSHOT_CHECK_SECONDS.
+
+SNAPSHOT_FORMAT = 1
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE courses (code TEXT PRIMARY KEY, name TEXT) WITHOUT ROWID;
+CREATE TABLE instructors (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE offerings (
+    id INTEGER PRIMARY KEY,
+    course_code TEXT NOT NULL,
+    academic_year TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    term_key INTEGER,
+    current_registered INTEGER,
+    plot_file_id TEXT,
+    grade_counts BLOB NOT NULL -- little-endian int32 per grade, in the order of meta.grade_types
+);
+CREATE TABLE offering_instructors (
+    offering_id INTEGER NOT NULL,
+    instructor_id INTEGER NOT NULL,
+    PRIMARY KEY (offering_id, instructor_id)
+) WITHOUT ROWID;
+-- Unified search: `primary_text` carries ts weight A (course codes, instructor names), `secondary_text` B (course titles)
+CREATE VIRTUAL TABLE search_index USING fts5(type UNINDEXED, code UNINDEXED, id UNINDEXED, name UNINDEXED, primary_text, secondary_text);
+"""
+
+SNAPSHOT_INDEXES = """
+CREATE UNIQUE INDEX uq_offering ON offerings (course_code, academic_year, semester);
+CREATE INDEX ix_offerings_course_term ON offerings (course_code, term_key DESC);
+"""
+
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "data/grade_catalogue.sqlite")
+# How often the API checks whether the snapshot file has been replaced
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", "5"))
+
+
+def write_snapshot(catalogue, path: str) -> int:
+    """
+    Writes a read_model.Catalogue to a SQLite file at `path`, replacing any existing one atomically
+    (readers holding the old file keep reading it). Returns the size of the file in bytes.
+    """
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF;")
+        conn.executescript(SNAPSHOT_SCHEMA)
+        with conn:
+            conn.executemany("INSERT INTO courses VALUES (?, ?)", zip(catalogue.course_codes, catalogue.course_names))
+            conn.executemany("INSERT INTO instructors VALUES (?, ?)",
+                             zip(catalogue.instructor_ids.tolist(), catalogue.instructor_names))
+
+            counts = catalogue.grade_counts.astype('<i4')
+            conn.executemany("INSERT INTO offerings VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+                (
+                    int(catalogue.offering_ids[row]),
+                    catalogue.course_codes[catalogue.offering_courses[row]],
+                    catalogue.years[catalogue.offering_years[row]],
+                    catalogue.semesters[catalogue.offering_semesters[row]],
+                    None if catalogue.term_keys[row] == np.iinfo(np.int32).max else int(catalogue.term_keys[row]),
+                    None if catalogue.current_registered[row] < 0 else int(catalogue.current_registered[row]),
+                    catalogue.plot_file_ids[row],
+                    counts[row].tobytes(),
+                )
+                for row in range(len(catalogue.offering_ids))
+            ))
+            offsets = catalogue.instructor_offsets
+            conn.executemany("INSERT INTO offering_instructors VALUES (?, ?)", (
+                (int(catalogue.offering_ids[row]), int(catalogue.instructor_ids[ref]))
+                for row in range(len(catalogue.offering_ids))
+                for ref in catalogue.instructor_refs[offsets[row]:offsets[row + 1]]
+            ))
+
+            conn.executemany("INSERT INTO search_index VALUES ('course', ?, NULL, ?, ?, ?)", (
+                (code, name, code, name or "") for code, name in zip(catalogue.course_codes, catalogue.course_names)
+            ))
+            conn.executemany("INSERT INTO search_index VALUES ('instructor', NULL, ?, ?, ?, '')", (
+                (instructor_id, name, name) for instructor_id, name in zip(catalogue.instructor_ids.tolist(), catalogue.instructor_names)
+            ))
+
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("format", str(SNAPSHOT_FORMAT)),
+                ("dataset_version", "" if catalogue.version is None else str(catalogue.version)),
+                ("exported_at", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())),
+                ("grade_types", json.dumps(models.GRADE_TYPES)),
+                ("courses", str(len(catalogue.course_codes))),
+                ("instructors", str(len(catalogue.instructor_names))),
+                ("offerings", str(len(catalogue.offering_ids))),
+            ])
+        # Indexes are cheaper to build once the tables are full
+        conn.executescript(SNAPSHOT_INDEXES)
+        conn.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+class SnapshotCatalogue:
+    """
+    A read-only SQLite snapshot, memory-mapped, answering the same questions as read_model.Catalogue
+    (and returning the same transient ORM objects).
+    """
+
+    def __init__(self, path: str):
+        stat = os.stat(path)
+        # Identifies this particular file, so a replacement can be noticed
+        self.file_id = (stat.st_ino, stat.st_mtime_ns)
+        self.path = path
+        self.file_bytes = stat.st_size
+        # immutable=1: no locking or change detection, the file is never written once exported
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+        self.conn.execute(f"PRAGMA mmap_size = {self.file_bytes}")
+        self.meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if int(self.meta.get("format", 0)) != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is snapshot format {self.meta.get('format')}, expected {SNAPSHOT_FORMAT}.")
+        self.version = int(self.meta["dataset_version"]) if self.meta["dataset_version"] else None
+        self.grade_types = json.loads(self.meta["grade_types"])
+
+    def instructor_rows(self) -> List[Tuple[int, str]]:
+        return self.conn.execute("SELECT id, name FROM instructors ORDER BY id").fetchall()
+
+    def _instructors_of(self, offering_ids: List[int]) -> dict:
+        placeholders = ", ".join("?" * len(offering_ids))
+        instructors = {offering_id: [] for offering_id in offering_ids}
+        for offering_id, instructor_id, name in self.conn.execute(
+            "SELECT oi.offering_id, i.id, i.name FROM offering_instructors oi JOIN instructors i ON i.id = oi.instructor_id "
+            f"WHERE oi.offering_id IN ({placeholders}) ORDER BY i.name", offering_ids,
+        ):
+            instructors[offering_id].append(models.Instructor(id=instructor_id, name=name))
+        return instructors
+
+    _OFFERING_COLUMNS = "o.id, o.course_code, o.academic_year, o.semester, o.current_registered, o.plot_file_id, c.name"
+
+    def _offerings(self, rows: list) -> List[models.Offering]:
+        if not rows:
+            return []
+        instructors = self._instructors_of([row[0] for row in rows])
+        courses = {}
+        return [
+            models.Offering(
+                id=offering_id, course_code=course_code, academic_year=academic_year, semester=semester,
+                current_registered=current_registered, plot_file_id=plot_file_id,
+                course=courses.setdefault(course_code, models.Course(code=course_code, name=course_name)),
+                instructors=instructors[offering_id],
+            )
+            for offering_id, course_code, academic_year, semester, current_registered, plot_file_id, course_name in rows
+        ]
+
+    # Search, mirroring crud.search_courses / crud.search_all
+
+    def search_courses(self, query: str, limit: int = 25, after_code: Optional[str] = None) -> Tuple[List[models.Course], bool]:
+        canonical = crud.canonicalize_course_code(query)
+        if after_code is None and crud.COURSE_CODE_PATTERN.match(canonical):
+            candidates = [canonical] + ([canonical + letter for letter in string.ascii_uppercase] if not canonical[-1].isalpha() else [])
+            matches = self.conn.execute(
+                f"SELECT code, name FROM courses WHERE code IN ({', '.join('?' * len(candidates))}) ORDER BY code LIMIT 2", candidates
+            ).fetchall()
+            exact = [match for match in matches if match[0] == canonical]
+            if exact or len(matches) == 1:
+                return [models.Course(code=code, name=name) for code, name in exact or matches], False
+
+        # LIKE is case-insensitive for ASCII in SQLite, like ILIKE
+        sql = "SELECT code, name FROM courses WHERE (code LIKE ? OR code LIKE ? OR name LIKE ?)"
+        params = [f"%{query}%", f"%{canonical}%", f"%{query}%"]
+        if after_code is not None:
+            sql += " AND code > ?"
+            params.append(after_code)
+        rows = self.conn.execute(sql + " ORDER BY code LIMIT ?", params + [limit + 1]).fetchall()
+        return [models.Course(code=code, name=name) for code, name in rows[:limit]], len(rows) > limit
+
+    def search_all(self, query: str, limit: int = 25) -> List[dict]:
+        """The unified search, on FTS5: the same prefix matching, ranked by bm25 with the A/B weights."""
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        # Only word characters reach the MATCH expression, so the text can't inject FTS5 syntax
+        match = "{primary_text secondary_text} : (" + " AND ".join(f'"{word}"*' for word in words) + ")"
+        rows = self.conn.execute(
+            "SELECT type, code, id, name, -bm25(search_index, 0, 0, 0, 0, 1.0, 0.4) AS rank FROM search_index "
+            "WHERE search_index MATCH ? ORDER BY rank DESC, name IS NULL, name LIMIT ?", (match, limit),
+        ).fetchall()
+        return [{"type": type_, "code": code, "id": id_, "name": name, "rank": rank} for type_, code, id_, name, rank in rows]
+
+    # Offerings and grades, mirroring the crud functions of the same names
+
+    def get_offering_by_details(self, course_code: str, academic_year: str, semester: str) -> Optional[models.Offering]:
+        rows = self.conn.execute(
+            f"SELECT {self._OFFERING_COLUMNS} FROM offerings o JOIN courses c ON c.code = o.course_code "
+            "WHERE o.course_code = ? AND o.academic_year = ? AND o.semester = ?", (course_code, academic_year, semester),
+        ).fetchall()
+        offerings = self._offerings(rows)
+        return offerings[0] if offerings else None
+
+    def get_terms_for_course(self, course_code: str, from_year: Optional[int] = None, to_year: Optional[int] = None) -> List[models.Offering]:
+        sql = f"SELECT {self._OFFERING_COLUMNS} FROM offerings o JOIN courses c ON c.code = o.course_code WHERE o.course_code = ?"
+        params = [course_code.upper()]
+        if from_year is not None:
+            sql += " AND o.term_key >= ?"
+            params.append(from_year * 10)
+        if to_year is not None:
+            sql += " AND o.term_key < ?"
+            params.append((to_year + 1) * 10)
+        # Latest first, with unknown terms first as Postgres sorts NULLs under DESC
+        return self._offerings(self.conn.execute(sql + " ORDER BY o.term_key IS NOT NULL, o.term_key DESC, o.id", params).fetchall())
+
+    def get_grades_for_offering(self, offering_id: int) -> Tuple[Optional[models.Offering], List[models.Grade]]:
+        rows = self.conn.execute(
+            f"SELECT {self._OFFERING_COLUMNS}, o.grade_counts FROM offerings o JOIN courses c ON c.code = o.course_code WHERE o.id = ?",
+            (offering_id,),
+        ).fetchall()
+        if not rows:
+            return None, []
+        counts = np.frombuffer(rows[0][-1], dtype='<i4')
+        grades = [
+            models.Grade(offering_id=offering_id, grade_type=grade_type, count=int(count))
+            for grade_type, count in zip(self.grade_types, counts) if count
+        ]
+        return self._offerings([rows[0][:-1]])[0], grades
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "snapshot": self.path,
+            "exported_at": self.meta.get("exported_at"),
+            "courses": int(self.meta["courses"]),
+            "instructors": int(self.meta["instructors"]),
+            "offerings": int(self.meta["offerings"]),
+            "file_mb": round(self.file_bytes / 2**20, 1),
+        }
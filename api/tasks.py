@@ -2,21 +2,30 @@ import asyncio
 import os
 import logging
 from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 from celery import shared_task
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select, update, any_, bindparam, BIGINT
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 from telegram import Bot as TelegramBot
 from telegram.constants import ParseMode
 from telegram.error import TelegramError, Forbidden, BadRequest
 
-from .models import User
+from .models import User, ScheduledBroadcast
+from .worker import run_async, get_session_factory, get_bot
+from .utils.paths import BROADCAST_MEDIA_DIR, TELEGRAM_FILE_ID_PATTERN, resolve_inside, is_url
 
 # --- Configuration ---
-# Keep settings in one place, loaded from environment variables
-DATABASE_URL = os.getenv("DATABASE_URL")
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Keep settings in one place, loaded from environment variables.
+# The DB engine and bot client themselves live in api/worker.py and are shared per process.
+# How many blocked user IDs to collect before unsubscribing them in one UPDATE
+UNSUBSCRIBE_CHUNK_SIZE = int(os.getenv("BROADCAST_UNSUBSCRIBE_CHUNK_SIZE", "500"))
+# How far ahead of `send_at` a scheduled broadcast is handed to the sender so it can pre-warm
+SCHEDULED_PREWARM_SECONDS = int(os.getenv("SCHEDULED_BROADCAST_PREWARM_SECONDS", "120"))
+# The folder grade sheets are dropped into; ingest requests can only point inside it
+INGEST_WATCH_DIR = os.getenv("INGEST_WATCH_DIR", "/app/data/incoming")
 logger = logging.getLogger(__name__)
 
 # A simple dataclass to hold the results of our broadcast
@@ -26,22 +35,74 @@ class BroadcastReport:
     sent: int = 0
     blocked: int = 0
     failed: int = 0
+    unsubscribed: int = 0
+
+# The photo or document attached to a media broadcast.
+# `file_id` starts empty and is captured from the first successful upload,
+# after which every remaining recipient is sent the file_id instead of the bytes.
+@dataclass
+class BroadcastMedia:
+    media_type: str  # "photo" or "document"
+    source: str  # A URL, an existing Telegram file_id, or a file inside BROADCAST_MEDIA_DIR
+    file_id: Optional[str] = None
+
+    def payload(self):
+        """Returns what to hand to Telegram: the cached file_id, or the original source."""
+        if self.file_id:
+            return self.file_id
+        if is_url(self.source):
+            return self.source
+        # Checked again here, not just by the API schema: scheduled rows outlive config changes
+        path = resolve_inside(BROADCAST_MEDIA_DIR, self.source)
+        if path is not None and os.path.isfile(path):
+            with open(path, "rb") as f:
+                return f.read()
+        if TELEGRAM_FILE_ID_PATTERN.match(self.source):
+            return self.source
+        raise ValueError(f"Media source {self.source!r} is not a URL, a file_id or a file in the media directory.")
 
 # --- Helper Functions ---
 
-async def get_subscribed_user_ids(session: AsyncSession) -> list[int]:
-    """Fetches all active and subscribed user IDs from the database."""
+async def get_subscribed_user_ids(
+    session: AsyncSession,
+    active_within_days: Optional[int] = None,
+    subscribed_since: Optional[str] = None,
+    user_ids: Optional[list[int]] = None,
+) -> list[int]:
+    """
+    Fetches active and subscribed user IDs from the database.
+    The optional audience filters each map onto an indexed column of `users`,
+    so a targeted broadcast never has to scan the whole table.
+    """
+    if user_ids is not None and not user_ids:
+        # An explicit empty list targets nobody, not everybody
+        return []
     stmt = select(User.telegram_user_id).where(User.is_subscribed == True, User.is_blocked == False)
+    if active_within_days:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=active_within_days)
+        stmt = stmt.where(User.last_active_at >= cutoff)
+    if subscribed_since:
+        stmt = stmt.where(User.subscribed_at >= datetime.fromisoformat(subscribed_since))
+    if user_ids is not None:
+        stmt = stmt.where(User.telegram_user_id == any_(bindparam("audience_ids", value=list(user_ids), type_=ARRAY(BIGINT))))
     result = await session.execute(stmt)
     return result.scalars().all()
 
-async def send_message_to_user(bot: TelegramBot, user_id: int, message: str) -> str:
+async def send_message_to_user(bot: TelegramBot, user_id: int, message: str, media: Optional[BroadcastMedia] = None) -> str:
     """
-    Tries to send a message to a single user and returns the status.
+    Tries to send a message (or a photo/document captioned with it) to a single user and returns the status.
     Returns: "sent", "blocked", or "failed"
     """
     try:
-        await bot.send_message(chat_id=user_id, text=message, parse_mode=ParseMode.HTML)
+        if media is None:
+            await bot.send_message(chat_id=user_id, text=message, parse_mode=ParseMode.HTML)
+        elif media.media_type == "photo":
+            sent = await bot.send_photo(chat_id=user_id, photo=media.payload(), caption=message, parse_mode=ParseMode.HTML)
+            # Telegram returns several sizes; the last one is the original
+            media.file_id = media.file_id or sent.photo[-1].file_id
+        else:
+            sent = await bot.send_document(chat_id=user_id, document=media.payload(), caption=message, parse_mode=ParseMode.HTML)
+            media.file_id = media.file_id or sent.document.file_id
         return "sent"
     except Forbidden:
         logger.warning(f"User {user_id} has blocked the bot.")
@@ -50,53 +111,234 @@ async def send_message_to_user(bot: TelegramBot, user_id: int, message: str) ->
         logger.error(f"Failed to send to {user_id}: {e}")
         return "failed"
 
+async def unsubscribe_unreachable_users(session: AsyncSession, user_ids: list[int]) -> int:
+    """
+    Marks a chunk of users who blocked the bot as unsubscribed in a single UPDATE,
+    so future broadcasts no longer target them. Returns the number of rows updated.
+    """
+    if not user_ids:
+        return 0
+    # Bind the whole chunk as one array parameter: ... WHERE telegram_user_id = ANY(:user_ids)
+    ids_param = bindparam("user_ids", value=list(user_ids), type_=ARRAY(BIGINT))
+    stmt = (
+        update(User)
+        .where(User.telegram_user_id == any_(ids_param))
+        .values(is_subscribed=False)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    await session.commit()
+    return result.rowcount
+
 # --- Main Celery Task ---
 
-# By making the task async, Celery handles the event loop for us.
-@shared_task(bind=True, name="api.tasks.send_broadcast_message", max_retries=2, default_retry_delay=300)
-async def send_broadcast_message(self, message_text: str):
+async def _run_broadcast(
+    task_id: str,
+    message_text: str,
+    audience: Optional[dict] = None,
+    media: Optional[dict] = None,
+    send_at: Optional[str] = None,
+    scheduled_id: Optional[int] = None,
+) -> dict:
     """
-    A Celery task to send a message to all subscribed users.
+    Sends the broadcast using the worker's shared engine and bot client.
+    If `send_at` is given, the subscriber list and connections are prepared first
+    and the actual sending waits until that time. If `scheduled_id` is given and that
+    scheduled broadcast was cancelled in the meantime, nothing is sent.
     """
-    task_id = self.request.id
-    logger.info(f"Starting broadcast task {task_id}...")
-
-    if not TELEGRAM_BOT_TOKEN or not DATABASE_URL:
+    session_factory = get_session_factory()
+    bot = get_bot()
+    if session_factory is None or bot is None:
         logger.error(f"Task {task_id} failed: Bot token or DB URL not configured.")
         return {"status": "error", "message": "Configuration missing."}
 
-    # Create resources for this task run
-    engine = create_async_engine(DATABASE_URL, pool_size=5)
-    bot = TelegramBot(token=TELEGRAM_BOT_TOKEN)
     report = BroadcastReport()
+    # One instance for the whole run, so the file_id captured on the first send is reused
+    broadcast_media = BroadcastMedia(**media) if media else None
 
     try:
-        async with sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
-            user_ids = await get_subscribed_user_ids(session)
+        async with session_factory() as session:
+            user_ids = await get_subscribed_user_ids(session, **(audience or {}))
             report.total_targeted = len(user_ids)
             logger.info(f"Task {task_id}: Targeting {report.total_targeted} users.")
 
-            for user_id in user_ids:
-                status = await send_message_to_user(bot, user_id, message_text)
-                if status == "sent":
-                    report.sent += 1
-                elif status == "blocked":
-                    report.blocked += 1
-                else:
-                    report.failed += 1
-                
-                # A small delay to avoid hitting Telegram's rate limits
-                await asyncio.sleep(0.05)
+            if send_at:
+                # Pre-warm: the subscriber batch is already resolved above; open the
+                # Telegram connection now so the first sends don't pay for it.
+                await bot.get_me()
+                delay = (datetime.fromisoformat(send_at) - datetime.now(timezone.utc)).total_seconds()
+                if delay > 0:
+                    logger.info(f"Task {task_id}: Pre-warmed, waiting {delay:.0f}s until scheduled send time.")
+                    await asyncio.sleep(delay)
+
+            if scheduled_id is not None:
+                # A recurring broadcast stays pending after dispatch, so it can be cancelled while this waited
+                current_status = await session.scalar(
+                    select(ScheduledBroadcast.status).where(ScheduledBroadcast.id == scheduled_id)
+                )
+                if current_status in (None, 'cancelled'):
+                    logger.info(f"Task {task_id}: Scheduled broadcast {scheduled_id} was cancelled; not sending.")
+                    return {"status": "cancelled"}
+
+            unreachable_ids = []
+            try:
+                for user_id in user_ids:
+                    status = await send_message_to_user(bot, user_id, message_text, broadcast_media)
+                    if status == "sent":
+                        report.sent += 1
+                    elif status == "blocked":
+                        report.blocked += 1
+                        unreachable_ids.append(user_id)
+                    else:
+                        report.failed += 1
+
+                    if len(unreachable_ids) >= UNSUBSCRIBE_CHUNK_SIZE:
+                        report.unsubscribed += await unsubscribe_unreachable_users(session, unreachable_ids)
+                        unreachable_ids = []
+
+                    # A small delay to avoid hitting Telegram's rate limits
+                    await asyncio.sleep(0.05)
+            finally:
+                # Flush whatever is left over from the last partial chunk, even if sending stopped part-way.
+                # It gets a session of its own (the one above may be broken by the failure that got us here),
+                # and a failing flush is only logged so it doesn't hide that failure.
+                try:
+                    async with session_factory() as flush_session:
+                        report.unsubscribed += await unsubscribe_unreachable_users(flush_session, unreachable_ids)
+                except Exception as flush_error:
+                    logger.error(f"Task {task_id}: couldn't unsubscribe {len(unreachable_ids)} unreachable users: "
+                                 f"{flush_error}", exc_info=True)
 
     except Exception as e:
         logger.error(f"Task {task_id} failed with a critical error: {e}", exc_info=True)
         return {"status": "error", "message": str(e)}
-    finally:
-        # Clean up the database connection pool
-        await engine.dispose()
 
-    summary = f"Broadcast complete. Sent: {report.sent}, Blocked: {report.blocked}, Failed: {report.failed}"
+    summary = (
+        f"Broadcast complete. Sent: {report.sent}, Blocked: {report.blocked}, "
+        f"Failed: {report.failed}, Unsubscribed: {report.unsubscribed}"
+    )
     logger.info(f"Task {task_id}: {summary}")
     
     # Return a simple dictionary, which is easy for other services to use
-    return asdict(report)
\ No newline at end of file
+    return asdict(report)
+
+
+# Celery doesn't await coroutines, so the task itself is sync and drives
+# the coroutine on the worker's long-lived event loop.
+@shared_task(bind=True, name="api.tasks.send_broadcast_message", max_retries=2, default_retry_delay=300)
+def send_broadcast_message(
+    self,
+    message_text: str,
+    audience: Optional[dict] = None,
+    media: Optional[dict] = None,
+    send_at: Optional[str] = None,
+    scheduled_id: Optional[int] = None,
+):
+    """
+    A Celery task to send a message to all subscribed users,
+    optionally narrowed down by the filters in `audience`.
+    If `media` is given, the message is sent as the caption of that photo or document.
+    """
+    task_id = self.request.id
+    logger.info(f"Starting broadcast task {task_id} (audience: {audience or 'all subscribers'})...")
+    return run_async(_run_broadcast(task_id, message_text, audience, media, send_at, scheduled_id))
+
+
+# --- Scheduled Broadcasts ---
+
+async def _dispatch_scheduled_broadcasts() -> int:
+    """
+    Hands every pending broadcast due within the pre-warm window to the sender.
+    One-off broadcasts are marked as queued; recurring ones move on to their next send time.
+    """
+    session_factory = get_session_factory()
+    if session_factory is None:
+        logger.error("Scheduled broadcast dispatch skipped: DB URL not configured.")
+        return 0
+
+    now = datetime.now(timezone.utc)
+    horizon = now + timedelta(seconds=SCHEDULED_PREWARM_SECONDS)
+    dispatched = 0
+
+    async with session_factory() as session:
+        # SKIP LOCKED keeps two overlapping beat ticks from queueing the same broadcast twice
+        stmt = select(ScheduledBroadcast).where(
+            ScheduledBroadcast.status == 'pending',
+            ScheduledBroadcast.send_at <= horizon,
+        ).with_for_update(skip_locked=True)
+        due = (await session.execute(stmt)).scalars().all()
+
+        # Claim each broadcast and commit before anything is queued: if the commit failed after
+        # queueing, the next tick would pick the same rows up again and send them twice.
+        claimed = []
+        for scheduled in due:
+            claimed.append((
+                scheduled.id,
+                [scheduled.message_text, scheduled.audience, scheduled.media],
+                scheduled.send_at.isoformat(),
+            ))
+            scheduled.last_queued_at = now
+            if scheduled.repeat_every_minutes:
+                interval = timedelta(minutes=scheduled.repeat_every_minutes)
+                while scheduled.send_at <= horizon:
+                    scheduled.send_at += interval
+            else:
+                scheduled.status = 'queued'
+        await session.commit()
+
+        for broadcast_id, args, send_at in claimed:
+            task = send_broadcast_message.apply_async(
+                args=args, kwargs={"send_at": send_at, "scheduled_id": broadcast_id}
+            )
+            await session.execute(
+                update(ScheduledBroadcast)
+                .where(ScheduledBroadcast.id == broadcast_id)
+                .values(last_task_id=task.id)
+            )
+            await session.commit()
+            dispatched += 1
+            logger.info(f"Scheduled broadcast {broadcast_id} dispatched as task {task.id}.")
+
+    return dispatched
+
+
+@shared_task(name="api.tasks.dispatch_scheduled_broadcasts")
+def dispatch_scheduled_broadcasts():
+    """Periodic task run by Celery beat to queue scheduled broadcasts that are coming due."""
+    return run_async(_dispatch_scheduled_broadcasts())
+
+
+# --- Grade Sheet Ingest ---
+
+async def _run_directory_ingest(task, directory: str, concurrency: int) -> dict:
+    """Runs the directory ingest on the worker's shared engine, publishing progress as task state."""
+    # Imported here: the ingest pulls in pandas/pyarrow, which the API process (it imports this module) doesn't need
+    from scripts.ingest_data import directory_ingest, refresh_course_summaries, refresh_caches
+
+    session_factory = get_session_factory()
+    if session_factory is None:
+        logger.error(f"Task {task.request.id} failed: DB URL not configured.")
+        return {"status": "error", "message": "Configuration missing."}
+
+    def on_progress(report):
+        task.update_state(state="PROGRESS", meta=asdict(report))
+
+    report = await directory_ingest(directory, concurrency, session_factory=session_factory, on_progress=on_progress)
+    if report.ingested:
+        await refresh_course_summaries(session_factory)
+        await refresh_caches(session_factory)
+    logger.info(
+        f"Task {task.request.id}: Ingest complete. Ingested: {report.ingested}, Skipped: {report.skipped}, "
+        f"Failed: {report.failed}, Offerings: {report.rows}"
+    )
+    return asdict(report)
+
+
+@shared_task(bind=True, name="api.tasks.ingest_grade_directory")
+def ingest_grade_directory(self, directory: str, concurrency: int = 4):
+    """
+    A Celery task that ingests every new grade sheet (CSV/Parquet/Arrow) in `directory`.
+    Files whose checksum was ingested before are skipped, so re-running it is cheap.
+    """
+    logger.info(f"Starting ingest task {self.request.id} for {directory}...")
+    return run_async(_run_directory_ingest(self, directory, concurrency))
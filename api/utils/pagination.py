@@ -0,0 +1,23 @@
+import base64
+import binascii
+import json
+
+# --- Keyset Cursors ---
+# A cursor is the sort key of the last row on a page, as URL-safe base64 JSON. Clients treat it as
+# an opaque string and pass it back unchanged to get the rows that sort after it.
+
+
+def encode_cursor(key: dict) -> str:
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, field: str, kind: type = str):
+    """Returns `field` (of type `kind`) from a cursor made by encode_cursor; raises ValueError for anything else."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Malformed cursor.")
+    if not isinstance(key, dict) or type(key.get(field)) is not kind:
+        raise ValueError("Malformed cursor.")
+    return key[field]
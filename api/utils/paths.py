@@ -0,0 +1,26 @@
+import os
+import re
+from typing import Optional
+
+# --- Path Containment ---
+# Endpoints that take a file or folder name from a request only ever resolve it inside a configured root.
+
+# The folder broadcast photos and documents are uploaded from; media sources that aren't URLs or
+# Telegram file_ids must point inside it
+BROADCAST_MEDIA_DIR = os.getenv("BROADCAST_MEDIA_DIR", "/app/data/media")
+
+# Telegram file_ids are URL-safe base64: no slashes, dots or spaces
+TELEGRAM_FILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{20,}$")
+
+
+def resolve_inside(root: str, path: str) -> Optional[str]:
+    """`path` (relative to `root`, or absolute) with symlinks resolved, or None if that lands outside `root`."""
+    root = os.path.realpath(root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        return None
+    return resolved
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("https://", "http://"))
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import logging
+from typing import Any, Coroutine, Optional
+
+from celery.concurrency import get_implementation
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from telegram import Bot as TelegramBot
+
+# --- Worker Resources ---
+# Celery runs plain (sync) functions, so async tasks need an event loop to run on.
+# Instead of building a new loop, engine and bot on every task run, each worker
+# process creates them once at startup and every task in api/tasks.py reuses them.
+# The loop is driven with run_until_complete, so a process may only run one task at a
+# time: use the prefork (the default) or solo pool, never threads, eventlet or gevent.
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+WORKER_DB_POOL_SIZE = int(os.getenv("WORKER_DB_POOL_SIZE", "5"))
+logger = logging.getLogger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[sessionmaker] = None
+_bot: Optional[TelegramBot] = None
+# Set at startup when the worker uses a pool that would run tasks concurrently in one process
+_unsupported_pool: Optional[str] = None
+
+SUPPORTED_POOLS = ("prefork", "solo")
+
+
+def _init_resources() -> None:
+    """Creates the event loop, database engine and bot client for this process."""
+    global _loop, _engine, _session_factory, _bot
+    if _loop is not None:
+        return
+
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+
+    if DATABASE_URL:
+        _engine = create_async_engine(DATABASE_URL, pool_size=WORKER_DB_POOL_SIZE, pool_pre_ping=True)
+        _session_factory = sessionmaker(_engine, class_=AsyncSession, expire_on_commit=False)
+    else:
+        logger.error("DATABASE_URL is not set; database-backed tasks will fail.")
+
+    if TELEGRAM_BOT_TOKEN:
+        _bot = TelegramBot(token=TELEGRAM_BOT_TOKEN)
+        # Opens the bot's HTTP connection pool once for the whole process
+        _loop.run_until_complete(_bot.initialize())
+    else:
+        logger.error("TELEGRAM_BOT_TOKEN is not set; Telegram tasks will fail.")
+
+    logger.info(f"Worker resources initialized (pid {os.getpid()}).")
+
+
+def _dispose_resources() -> None:
+    """Closes the bot client and engine pool, then the event loop itself."""
+    global _loop, _engine, _session_factory, _bot
+    if _loop is None:
+        return
+
+    try:
+        if _bot is not None:
+            _loop.run_until_complete(_bot.shutdown())
+        if _engine is not None:
+            _loop.run_until_complete(_engine.dispose())
+    except Exception as e:
+        logger.error(f"Error while disposing worker resources: {e}", exc_info=True)
+    finally:
+        _loop.close()
+        _loop, _engine, _session_factory, _bot = None, None, None, None
+        logger.info(f"Worker resources disposed (pid {os.getpid()}).")
+
+
+@worker_init.connect
+def on_worker_init(sender=None, **kwargs) -> None:
+    global _unsupported_pool
+    # Errors raised by signal handlers are only logged, so run_async does the refusing
+    pool_cls = get_implementation(sender.pool_cls)
+    if pool_cls not in [get_implementation(name) for name in SUPPORTED_POOLS]:
+        _unsupported_pool = pool_cls.__module__
+        logger.critical(f"Worker pool {_unsupported_pool} is not supported; start the worker with --pool prefork or --pool solo.")
+
+
+# Prefork workers fire the process-level signals in each child process.
+@worker_process_init.connect
+def on_worker_process_init(**kwargs) -> None:
+    _init_resources()
+
+
+@worker_process_shutdown.connect
+def on_worker_process_shutdown(**kwargs) -> None:
+    _dispose_resources()
+
+
+# The solo pool only fires the worker-level shutdown signal.
+@worker_shutdown.connect
+def on_worker_shutdown(**kwargs) -> None:
+    _dispose_resources()
+
+
+# --- Public Helpers ---
+
+def run_async(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Runs a coroutine to completion on this worker's long-lived event loop.
+    Resources are created lazily if the init signal didn't fire (e.g. solo pool or eager mode).
+    """
+    if _unsupported_pool is not None:
+        raise RuntimeError(f"Async tasks can't run on the {_unsupported_pool} pool; use prefork or solo.")
+    _init_resources()
+    return _loop.run_until_complete(coro)
+
+
+def get_session_factory() -> Optional[sessionmaker]:
+    """Returns the worker's shared session factory, or None if the DB isn't configured."""
+    return _session_factory
+
+
+def get_bot() -> Optional[TelegramBot]:
+    """Returns the worker's shared Telegram bot client, or None if the token isn't configured."""
+    return _bot
@@ -45,15 +45,28 @@ async def _make_api_request(
 
 # SECTION: Public API Functions
 
-async def search_items(query: str, search_type: str, user_id: int) -> List[Dict]:
-    """Searches for courses or professors."""
+async def search_items(query: str, search_type: str, user_id: int, cursor: Optional[str] = None,
+                       limit: Optional[int] = None) -> Dict:
+    """
+    Searches for courses or professors, one page at a time.
+    Returns `{"items": [...], "next_cursor": ...}`; pass `next_cursor` back as `cursor` for the next page.
+    """
     endpoint = f"/search/{'course' if search_type == 'course' else 'prof'}"
-    return await _make_api_request("GET", endpoint, user_id=user_id, params={"q": query})
+    params = {"q": query}
+    if cursor:
+        params["cursor"] = cursor
+    if limit:
+        params["limit"] = limit
+    return await _make_api_request("GET", endpoint, user_id=user_id, params=params)
 
 async def get_offerings_for_course(course_code: str, user_id: int) -> List[Dict]:
     """Gets all offerings (terms) for a specific course."""
     return await _make_api_request("GET", f"/grades/offering/by_course/{course_code}", user_id=user_id)
 
+async def get_course_summary_api(course_code: str, user_id: int) -> Dict:
+    """Gets a course's one-row overview (latest term, offerings, instructors, students, mean grade point)."""
+    return await _make_api_request("GET", f"/courses/{course_code}/summary", user_id=user_id)
+
 async def get_grades_distribution(offering_id: int, user_id: int) -> Dict:
     """Gets the full grade report for a single offering."""
     return await _make_api_request("GET", f"/grades/offering/{offering_id}", user_id=user_id)
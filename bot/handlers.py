@@ -1,9 +1,11 @@
 # bot/handlers.py
+import asyncio
 import logging
 import os  
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 from telegram.constants import ParseMode
+from telegram.helpers import escape_markdown
 import httpx
 import html
 import time #for simple caching if u wish to implement later
@@ -37,6 +39,7 @@ from constants import (
 from api_client import (
     search_items_api,
     get_offerings_for_course_api,
+    get_course_summary_api,
     get_offerings_for_prof_api,
     get_offering_details_api,
     get_grades_distribution_api,
@@ -130,6 +133,9 @@ def _clear_list_context(context: ContextTypes.DEFAULT_TYPE, list_type: str) -> N
     context.user_data.pop(f"{prefix}_results", None)
     context.user_data.pop(page_key, None)
     context.user_data.pop(unique_kb_key, None)
+    context.user_data.pop(f"{list_type}_next_cursor", None)
+    context.user_data.pop(f"{list_type}_page_items", None)
+    context.user_data.pop(f"{list_type}_cursors", None)
 
     if list_type == "course_search":
         context.user_data.pop('last_search_query_course', None)
@@ -141,6 +147,41 @@ def _clear_list_context(context: ContextTypes.DEFAULT_TYPE, list_type: str) -> N
         pass
 
 
+async def _fetch_search_page(context: ContextTypes.DEFAULT_TYPE, search_type: str, page: int,
+                             user_id: Optional[int]) -> List[Dict]:
+    """
+    Fetches one page of the current search from the API. Only that page is kept in user_data, with the
+    cursor for the page after it and a stack of the cursors that reach the pages before it (for "Previous"),
+    so a chat's state stays the same size however far the user pages.
+    """
+    list_type_key = "course_search" if search_type == 'course' else "prof_search"
+    cursors = context.user_data.setdefault(f'{list_type_key}_cursors', [None])  # cursors[n] fetches page n
+    if page == len(cursors):
+        next_cursor = context.user_data.get(f'{list_type_key}_next_cursor')
+        if not next_cursor:
+            raise ValueError(f"No page {page + 1} for the {search_type} search.")
+        cursors.append(next_cursor)
+    elif page > len(cursors) or page < 0:
+        raise ValueError(f"Can't jump to page {page + 1} of the {search_type} search.")
+
+    result = await search_items_api(query=context.user_data.get(f'last_search_query_{search_type}', ''),
+                                    search_type=search_type, user_id=user_id, cursor=cursors[page],
+                                    limit=ITEMS_PER_PAGE)
+    del cursors[page + 1:]
+    context.user_data[f'{list_type_key}_page_items'] = result['items']
+    context.user_data[f'{list_type_key}_next_cursor'] = result['next_cursor']
+    context.user_data[f'current_{list_type_key}_page'] = page
+    return result['items']
+
+
+def _create_search_page_keyboard(context: ContextTypes.DEFAULT_TYPE, search_type: str) -> InlineKeyboardMarkup:
+    """The keyboard for the stored search page: only its items, plus Prev/Next as the page and cursor allow."""
+    list_type_key = "course_search" if search_type == 'course' else "prof_search"
+    return create_search_results_keyboard(context.user_data.get(f'{list_type_key}_page_items') or [], search_type,
+                                          current_page=context.user_data.get(f'current_{list_type_key}_page', 0),
+                                          has_next=bool(context.user_data.get(f'{list_type_key}_next_cursor')))
+
+
 # --- MarkdownV2 Escaping Function ---
 def escape_markdown_v2(text: str) -> str:
     """Escapes special characters for Telegram MarkdownV2."""
@@ -241,9 +282,12 @@ def handle_api_error(error_source: str, error: Exception, context: ContextTypes.
 # --- Text Templates for Pagination ---
 # These continue to use ParseMode.MARKDOWN and html.escape as per original design
 # unless a full switch to MARKDOWN_V2 is planned for the entire bot.
-def _get_search_list_text_template(item_type: str, count: int, query: str, current_page_num: int) -> str:
+def _get_search_list_text_template(item_type: str, count: int, query: str, current_page_num: int,
+                                   more: bool = False) -> str:
     query_part = f" for '*{html.escape(query)}*'" if query else ""
-    count_text = f"Found {count} {item_type}" if count != 1 else f"Found 1 {item_type.rstrip('s')}"
+    # With more pages still on the server, `count` is only what has been fetched so far
+    count_text = f"Found {count}+ {item_type}" if more else (
+        f"Found {count} {item_type}" if count != 1 else f"Found 1 {item_type.rstrip('s')}")
     return f"✅ {count_text}{query_part}.\nPage {current_page_num}. Select one or browse:"
 
 
@@ -259,6 +303,106 @@ def _get_year_semester_list_text_template(course_code: str, count: int, current_
     return f"Offerings for **{html.escape(course_code)}**{prof_part}{count_text}.\nPage {current_page_num}. Select Year (Semester):"
 
 
+def _get_course_summary_text(summary: Optional[Dict]) -> str:
+    """A short Markdown overview shown above a course's term list; empty if there is no summary."""
+    if not summary:
+        return ""
+    # Course names come straight from the grade sheets and may contain Markdown characters (_ * ` [)
+    lines = [f"📘 **{escape_markdown(summary.get('course_name') or summary['course_code'])}**"]
+    if summary.get('latest_academic_year'):
+        lines.append(f"Last offered: {escape_markdown(summary['latest_academic_year'])} "
+                     f"({escape_markdown(summary.get('latest_semester') or '')})")
+    lines.append(f"{summary['offering_count']} offerings · {summary['instructor_count']} instructors · "
+                 f"{summary['students_graded']} students graded")
+    if summary.get('mean_grade_point') is not None:
+        lines.append(f"Mean grade point: {summary['mean_grade_point']:.2f}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _get_terms_and_summary(course_code: str, user_id: Optional[int]) -> tuple:
+    """
+    Fetches a course's year/semester list and its summary concurrently.
+    A course without offerings gives an empty list. The summary is a nice-to-have:
+    if it can't be fetched, it is None and the term list still shows.
+    """
+    async def terms_or_empty():
+        try:
+            return await get_offerings_for_course_api(course_code, user_id)
+        except httpx.HTTPStatusError as e:
+            # The API answers 404 for a course without offerings: that is an empty list, not an error
+            if e.response.status_code == 404:
+                return []
+            raise
+
+    async def summary_or_none():
+        try:
+            return await get_course_summary_api(course_code, user_id)
+        except httpx.HTTPError:
+            return None
+
+    return await asyncio.gather(terms_or_empty(), summary_or_none())
+
+
+def _get_no_offerings_reply(context: ContextTypes.DEFAULT_TYPE, course_code: str,
+                            search_mode: str) -> tuple:
+    """The "No offerings found" screen for a course: (Markdown text, keyboard, state to return)."""
+    back_button_cb_data_no_terms = None
+    back_button_text_no_terms = "⬅️ Back"
+    target_back_state_no_terms = SELECTING_COURSE_RESULTS
+
+    if search_mode == 'prof' and 'selected_prof_id' in context.user_data:
+        back_button_cb_data_no_terms = f"{BACK_TO_PROF_COURSE_LIST_PREFIX}{context.user_data['selected_prof_id']}"
+        back_button_text_no_terms = "⬅️ Back to Prof's Courses"
+        target_back_state_no_terms = SELECTING_COURSE_FOR_PROF
+    elif search_mode == 'course':
+        back_button_cb_data_no_terms = BACK_TO_COURSE_SEARCH_LIST
+        back_button_text_no_terms = "⬅️ Back to Course Search"
+        target_back_state_no_terms = SELECTING_COURSE_RESULTS
+
+    buttons_for_no_terms_kb = []
+    if back_button_cb_data_no_terms:
+        buttons_for_no_terms_kb.append(
+            [InlineKeyboardButton(back_button_text_no_terms, callback_data=back_button_cb_data_no_terms)])
+    buttons_for_no_terms_kb.append([InlineKeyboardButton("🔄 New Search", callback_data=BACK_TO_MAIN)])
+
+    prof_msg_part = f" by Prof. {html.escape(context.user_data.get('selected_prof_name', ''))}" if search_mode == 'prof' else ""
+    text = f"🤷 No offerings found for **{html.escape(course_code)}**{prof_msg_part}."
+    return text, InlineKeyboardMarkup(buttons_for_no_terms_kb), target_back_state_no_terms
+
+
+async def _show_course_terms(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int,
+                             course_code: str, user_id: Optional[int]) -> int:
+    """Shows a course's summary and year/semester list in place of the given message (course mode)."""
+    # The callbacks after this (year/semester, back buttons) read the mode, as if the course had been picked from the list
+    context.user_data['search_mode'] = 'course'
+    context.user_data['selected_course'] = course_code
+    try:
+        terms_data_list, summary = await _get_terms_and_summary(course_code, user_id)
+    except httpx.HTTPError as e:
+        # The search itself worked, so stay in the conversation and offer the way back instead of ending it
+        logger.error(f"Fetching terms for {course_code} failed after a unique search match: {e}")
+        terms_data_list, summary = [], None
+    context.user_data['selected_course_summary'] = summary
+
+    if not terms_data_list:
+        text, keyboard, next_state = _get_no_offerings_reply(context, course_code, 'course')
+        await context.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text,
+                                            reply_markup=keyboard, parse_mode=ParseMode.MARKDOWN)
+        return next_state
+
+    context.user_data['all_year_semester_list_results'] = terms_data_list
+    context.user_data['current_year_semester_list_page'] = 0
+    context.user_data['current_ys_list_mode'] = 'course'
+    context.user_data['current_ys_list_identifier'] = course_code
+
+    keyboard = create_year_semester_keyboard(terms_data_list, course_code, mode='course', current_page=0)
+    message_text = _get_course_summary_text(summary) + _get_year_semester_list_text_template(
+        course_code, len(terms_data_list), 1)
+    await context.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=message_text,
+                                        reply_markup=keyboard, parse_mode=ParseMode.MARKDOWN)
+    return SELECTING_YEAR_SEMESTER
+
+
 # --- HELPER: Display Final Grades & Plot ---
 # Uses ParseMode.HTML
 async def display_grades_and_plot(update: Update, context: ContextTypes.DEFAULT_TYPE,
@@ -543,21 +687,27 @@ async def _handle_search_text_input(update: Update, context: ContextTypes.DEFAUL
         return ConversationHandler.END
 
     try:
-        results = await search_items_api(query=query_text, search_type=search_type, user_id=user.id if user else None)
+        list_type_key = "course_search" if search_type == 'course' else "prof_search"
+        _clear_list_context(context, list_type_key)
+        context.user_data[f'last_search_query_{search_type}'] = query_text
+        # Only the first page; the others are fetched as the user pages on
+        results = await _fetch_search_page(context, search_type, 0, user.id if user else None)
         if not results:
             await context.bot.edit_message_text(chat_id=chat_id, message_id=bot_prompt_message_id,
                                                 text=f"🤷 No {item_name_plural} matching '*{html.escape(query_text)}*'. Try again:",
                                                 reply_markup=get_cancel_keyboard(), parse_mode=ParseMode.MARKDOWN)
             return current_typing_state
 
-        list_type_key = "course_search" if search_type == 'course' else "prof_search"
-        _clear_list_context(context, list_type_key)
-        context.user_data[f'all_{list_type_key}_results'] = results
-        context.user_data[f'current_{list_type_key}_page'] = 0
-        context.user_data[f'last_search_query_{search_type}'] = query_text
+        has_more = bool(context.user_data.get(f'{list_type_key}_next_cursor'))
 
-        keyboard = create_search_results_keyboard(results, search_type, current_page=0)
-        message_text = _get_search_list_text_template(item_name_plural, len(results), query_text, 1)
+        # A query naming exactly one course (e.g. "cs 201") skips the one-item list and opens its terms directly
+        if search_type == 'course' and len(results) == 1 and not has_more:
+            logger.info(f"Course search '{query_text}' resolved to {results[0]['code']}; showing its terms.")
+            return await _show_course_terms(context, chat_id, bot_prompt_message_id, results[0]['code'],
+                                            user.id if user else None)
+
+        keyboard = _create_search_page_keyboard(context, search_type)
+        message_text = _get_search_list_text_template(item_name_plural, len(results), query_text, 1, more=has_more)
         await context.bot.edit_message_text(chat_id=chat_id, message_id=bot_prompt_message_id, text=message_text,
                                             reply_markup=keyboard, parse_mode=ParseMode.MARKDOWN)
         return success_listing_state
@@ -636,34 +786,13 @@ async def select_item_callback(update: Update, context: ContextTypes.DEFAULT_TYP
                 terms_data_list = [o for o in all_offerings_for_prof if
                                    o.get('course', {}).get('code') == selected_course_code]
             else:
-                terms_data_list = await get_offerings_for_course_api(selected_course_code, user_id)
+                terms_data_list, context.user_data['selected_course_summary'] = await _get_terms_and_summary(
+                    selected_course_code, user_id)
 
             if not terms_data_list:
-                back_button_cb_data_no_terms = None
-                back_button_text_no_terms = "⬅️ Back"
-                target_back_state_no_terms = SELECTING_COURSE_RESULTS
-
-                if search_mode == 'prof' and 'selected_prof_id' in context.user_data:
-                    back_button_cb_data_no_terms = f"{BACK_TO_PROF_COURSE_LIST_PREFIX}{context.user_data['selected_prof_id']}"
-                    back_button_text_no_terms = "⬅️ Back to Prof's Courses"
-                    target_back_state_no_terms = SELECTING_COURSE_FOR_PROF
-                elif search_mode == 'course':
-                    back_button_cb_data_no_terms = BACK_TO_COURSE_SEARCH_LIST
-                    back_button_text_no_terms = "⬅️ Back to Course Search"
-                    target_back_state_no_terms = SELECTING_COURSE_RESULTS
-
-                buttons_for_no_terms_kb = []
-                if back_button_cb_data_no_terms:
-                    buttons_for_no_terms_kb.append(
-                        [InlineKeyboardButton(back_button_text_no_terms, callback_data=back_button_cb_data_no_terms)])
-                buttons_for_no_terms_kb.append([InlineKeyboardButton("🔄 New Search", callback_data=BACK_TO_MAIN)])
-                no_results_kb = InlineKeyboardMarkup(buttons_for_no_terms_kb)
-
-                prof_msg_part = f" by Prof. {html.escape(context.user_data.get('selected_prof_name', ''))}" if search_mode == 'prof' else ""
-                await query.edit_message_text(
-                    f"🤷 No offerings found for **{html.escape(selected_course_code)}**{prof_msg_part}.",
-                    reply_markup=no_results_kb, parse_mode=ParseMode.MARKDOWN)
-                return target_back_state_no_terms
+                text, no_results_kb, next_state = _get_no_offerings_reply(context, selected_course_code, search_mode)
+                await query.edit_message_text(text, reply_markup=no_results_kb, parse_mode=ParseMode.MARKDOWN)
+                return next_state
 
             context.user_data['all_year_semester_list_results'] = terms_data_list
             context.user_data['current_year_semester_list_page'] = 0
@@ -675,6 +804,8 @@ async def select_item_callback(update: Update, context: ContextTypes.DEFAULT_TYP
             prof_name_text_for_template = context.user_data.get("selected_prof_name") if search_mode == 'prof' else None
             message_text = _get_year_semester_list_text_template(selected_course_code, len(terms_data_list), 1,
                                                                  prof_name_text_for_template)
+            if search_mode == 'course':
+                message_text = _get_course_summary_text(context.user_data.get('selected_course_summary')) + message_text
             await query.edit_message_text(message_text, reply_markup=keyboard, parse_mode=ParseMode.MARKDOWN)
             return SELECTING_YEAR_SEMESTER
 
@@ -683,8 +814,8 @@ async def select_item_callback(update: Update, context: ContextTypes.DEFAULT_TYP
             context.user_data['selected_prof_id'] = selected_prof_id
             context.user_data['search_mode'] = 'prof'
             prof_name = f"ID {selected_prof_id}"
-            all_prof_results = context.user_data.get('all_prof_search_results', [])
-            for item in all_prof_results:
+            prof_page_items = context.user_data.get('prof_search_page_items') or []
+            for item in prof_page_items:
                 if item.get('id') == selected_prof_id: prof_name = item.get('name', prof_name); break
             context.user_data['selected_prof_name'] = prof_name
             logger.info(f"User {user_id} selected PROF: {prof_name} ({selected_prof_id})")
@@ -874,15 +1005,7 @@ async def _handle_pagination_callback(update: Update, context: ContextTypes.DEFA
 
         data_for_kb_creation = all_results_for_keyboard if all_results_for_keyboard is not None else all_results_primary
 
-        if list_type_key == "course_search":
-            kb_args = [data_for_kb_creation, 'course', new_page]
-            text_args_for_template.update({'item_type': 'courses', 'count': len(all_results_primary),
-                                           'query': context.user_data.get('last_search_query_course', '')})
-        elif list_type_key == "prof_search":
-            kb_args = [data_for_kb_creation, 'prof', new_page]
-            text_args_for_template.update({'item_type': 'professors', 'count': len(all_results_primary),
-                                           'query': context.user_data.get('last_search_query_prof', '')})
-        elif list_type_key == "prof_course_list":
+        if list_type_key == "prof_course_list":
             prof_id_str = page_data_parts[0]
             kb_args = [data_for_kb_creation, prof_id_str, new_page]
             prof_name = context.user_data.get('selected_prof_name', f"ID {prof_id_str}")
@@ -910,6 +1033,36 @@ async def _handle_pagination_callback(update: Update, context: ContextTypes.DEFA
         return ConversationHandler.END
 
 
+async def _handle_search_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE, search_type: str,
+                                      page_num_str: str, current_listing_state: int) -> int:
+    """Shows another page of search results, fetched from the API (the results aren't kept between pages)."""
+    query = update.callback_query
+    await query.answer()
+    message_to_edit_id = query.message.message_id
+    chat_id = query.message.chat_id
+    context.user_data['original_message_id_for_edit'] = message_to_edit_id
+    list_type_key = "course_search" if search_type == 'course' else "prof_search"
+
+    try:
+        if f'last_search_query_{search_type}' not in context.user_data:
+            raise ValueError(f"Search context for {search_type} pagination is missing.")
+        new_page = int(page_num_str)
+        items = await _fetch_search_page(context, search_type, new_page,
+                                         update.effective_user.id if update.effective_user else None)
+        keyboard = _create_search_page_keyboard(context, search_type)
+        message_text = _get_search_list_text_template(
+            'courses' if search_type == 'course' else 'professors', new_page * ITEMS_PER_PAGE + len(items),
+            context.user_data.get(f'last_search_query_{search_type}', ''), new_page + 1,
+            more=bool(context.user_data.get(f'{list_type_key}_next_cursor')))
+        await query.edit_message_text(text=message_text, reply_markup=keyboard, parse_mode=ParseMode.MARKDOWN)
+        return current_listing_state
+    except Exception as e:
+        logger.error(f"Error handling pagination CB '{query.data}': {e}", exc_info=True)
+        handle_api_error(f"pagination_{list_type_key}", e, context, message_id_to_edit=message_to_edit_id,
+                         chat_id=chat_id)  # Uses V2 for error
+        return ConversationHandler.END
+
+
 # ... (All pagination callback handlers: page_course_search_results_callback, etc. would be here)
 async def page_course_search_results_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     try:
@@ -918,9 +1071,7 @@ async def page_course_search_results_callback(update: Update, context: ContextTy
         logger.error(
             f"Bad CB data for page_course_search_results_callback: {update.callback_query.data}");
         return ConversationHandler.END
-    return await _handle_pagination_callback(update, context, "course_search", [page_num_str],
-                                             create_search_results_keyboard, _get_search_list_text_template,
-                                             SELECTING_COURSE_RESULTS, 1)
+    return await _handle_search_page_callback(update, context, 'course', page_num_str, SELECTING_COURSE_RESULTS)
 
 
 async def page_prof_search_results_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -930,9 +1081,7 @@ async def page_prof_search_results_callback(update: Update, context: ContextType
         logger.error(
             f"Bad CB data for page_prof_search_results_callback: {update.callback_query.data}");
         return ConversationHandler.END
-    return await _handle_pagination_callback(update, context, "prof_search", [page_num_str],
-                                             create_search_results_keyboard, _get_search_list_text_template,
-                                             SELECTING_PROF_RESULTS, 1)
+    return await _handle_search_page_callback(update, context, 'prof', page_num_str, SELECTING_PROF_RESULTS)
 
 
 async def page_prof_course_list_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -1072,7 +1221,7 @@ async def back_to_prof_search_list_callback(update: Update, context: ContextType
     await query.answer("⬅️ Back")
     logger.info(
         f"User {update.effective_user.id if update.effective_user else 'Unknown'}: Back to prof search results.")
-    all_results = context.user_data.get('all_prof_search_results')
+    all_results = context.user_data.get('prof_search_page_items')
     page = context.user_data.get('current_prof_search_page', 0)
     query_text = context.user_data.get('last_search_query_prof', '')
     msg_id = query.message.message_id;
@@ -1093,7 +1242,7 @@ async def back_to_prof_search_list_callback(update: Update, context: ContextType
     context.user_data.pop('current_ys_list_mode', None);
     context.user_data.pop('current_ys_list_identifier', None)
     try:
-        keyboard = create_search_results_keyboard(all_results, 'prof', page)
+        keyboard = _create_search_page_keyboard(context, 'prof')
         text = f"⬅️ Back to Prof Search Results for '*{html.escape(query_text)}*'.\nPage {page + 1}. Select:"
         await query.edit_message_text(text, reply_markup=keyboard, parse_mode=ParseMode.MARKDOWN)
     except Exception as e:
@@ -1108,7 +1257,7 @@ async def back_to_course_search_list_callback(update: Update, context: ContextTy
     await query.answer("⬅️ Back")
     logger.info(
         f"User {update.effective_user.id if update.effective_user else 'Unknown'}: Back to course search results.")
-    all_results = context.user_data.get('all_course_search_results')
+    all_results = context.user_data.get('course_search_page_items')
     page = context.user_data.get('current_course_search_page', 0)
     query_text = context.user_data.get('last_search_query_course', '')
     msg_id = query.message.message_id;
@@ -1126,7 +1275,7 @@ async def back_to_course_search_list_callback(update: Update, context: ContextTy
     context.user_data.pop('current_ys_list_mode', None);
     context.user_data.pop('current_ys_list_identifier', None)
     try:
-        keyboard = create_search_results_keyboard(all_results, 'course', page)
+        keyboard = _create_search_page_keyboard(context, 'course')
         text = f"⬅️ Back to Course Search Results for '*{html.escape(query_text)}*'.\nPage {page + 1}. Select:"
         await query.edit_message_text(text, reply_markup=keyboard, parse_mode=ParseMode.MARKDOWN)
     except Exception as e:
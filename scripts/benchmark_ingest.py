@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+#Setup Project Path
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts import ingest_data
+from scripts.ingest_data import Config, normalize_frame
+from scripts.synthetic_data import generate_grade_frame, GRADE_COLUMNS
+
+#Ingest Benchmarks
+#Times the vectorized normalize_frame against the old per-cell, per-row parsing
+#on a synthetic CSV (no database needed), and optionally the parallel ingest mode
+#for 1..N workers against DATABASE_URL. The parallel curve wipes and reloads the catalogue!
+
+
+def legacy_parse(df: pd.DataFrame, grade_cols: list) -> int:
+    """The pre-vectorization path: iterrows() with pd.to_numeric and title() per cell."""
+    def parse_int(value, default=0):
+        if pd.isna(value):
+            return default
+        numeric_val = pd.to_numeric(value, errors='coerce')
+        return default if pd.isna(numeric_val) else int(numeric_val)
+
+    def normalize_name(name, default="Unknown Instructor"):
+        if pd.isna(name) or not str(name).strip():
+            return default
+        return str(name).strip().title()
+
+    grade_cells = 0
+    for _, row in df.iterrows():
+        raw = row.get(Config.INSTRUCTOR_COL)
+        sorted(set(normalize_name(n) for n in (str(raw).split(',') if pd.notna(raw) else [])))
+        for col in Config.COUNT_COLS:
+            parse_int(row.get(col))
+        grade_cells += len([parse_int(row.get(col)) for col in grade_cols if parse_int(row.get(col)) > 0])
+    return grade_cells
+
+
+async def parallel_curve(normalized, max_workers: int):
+    """Runs the parallel ingest once per worker count and prints a rows/second curve."""
+    print(f"\nparallel ingest ({len(normalized.offerings):,} offerings):")
+    for workers in range(1, max_workers + 1):
+        started = time.perf_counter()
+        await ingest_data.parallel_ingest(normalized, workers)
+        elapsed = time.perf_counter() - started
+        rate = len(normalized.offerings) / elapsed
+        print(f"  {workers} workers: {elapsed:7.2f}s  {rate:10,.0f} rows/s  {'#' * int(rate // 2000)}")
+    await ingest_data.engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingest parsing on a synthetic grade CSV.")
+    parser.add_argument('--rows', type=int, default=100_000, help="Number of synthetic rows.")
+    parser.add_argument('--legacy-rows', type=int, default=10_000,
+                        help="Rows to time the legacy parser on (it is extrapolated to --rows).")
+    parser.add_argument('--parallel-curve', type=int, default=0, metavar='MAX_WORKERS',
+                        help="Also time the parallel ingest for 1..MAX_WORKERS workers (needs DATABASE_URL).")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'synthetic.csv')
+        generate_grade_frame(args.rows).to_csv(csv_path, index=False)
+
+        started = time.perf_counter()
+        df = pd.read_csv(csv_path, na_values=['', 'NA', '#N/A', 'NaN', 'NULL'], keep_default_na=True)
+        read_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    normalized = normalize_frame(df, GRADE_COLUMNS)
+    vectorized_s = time.perf_counter() - started
+
+    legacy_rows = min(args.legacy_rows, len(df))
+    started = time.perf_counter()
+    legacy_parse(df.head(legacy_rows), GRADE_COLUMNS)
+    legacy_s = (time.perf_counter() - started) * len(df) / legacy_rows
+
+    print(f"rows:                {len(df):,}")
+    print(f"read_csv:            {read_s:8.2f}s")
+    print(f"normalize_frame:     {vectorized_s:8.2f}s  ({len(df) / vectorized_s:,.0f} rows/s)")
+    print(f"legacy per-row:      {legacy_s:8.2f}s  ({len(df) / legacy_s:,.0f} rows/s, extrapolated from {legacy_rows:,})")
+    print(f"speedup:             {legacy_s / vectorized_s:8.1f}x")
+    print(f"output:              {len(normalized.offerings):,} offerings, "
+          f"{len(normalized.instructors):,} instructor links, {len(normalized.grades):,} grade counts")
+
+    if args.parallel_curve:
+        if ingest_data.engine is None:
+            print("DATABASE_URL is not set; skipping the parallel curve.")
+        else:
+            asyncio.run(parallel_curve(normalized, args.parallel_curve))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+#Setup Project Path
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+from api.cache import GradeCache
+from api.read_model import build_catalogue, fetch_catalogue_rows
+from api.snapshot import SNAPSHOT_PATH, write_snapshot
+
+#Catalogue Snapshot Export
+#Writes the grade catalogue (courses, instructors, offerings, grade counts) from DATABASE_URL
+#to a read-only SQLite file that the API serves with READ_MODEL=sqlite and SNAPSHOT_PATH.
+#The file is written next to the target and renamed over it, so a running API never sees half of it.
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+async def export_snapshot(database_url: str, path: str) -> dict:
+    """Reads the catalogue from the database and writes it to `path`. Returns the snapshot's stats."""
+    engine = create_async_engine(database_url)
+    cache = GradeCache(os.getenv("REDIS_URL"))
+    try:
+        # Tagged with the live dataset version, when there is one, so API logs can tell snapshots apart
+        version = await cache.version() if cache.enabled else None
+        rows = await fetch_catalogue_rows(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    finally:
+        await cache.close()
+        await engine.dispose()
+
+    catalogue = build_catalogue(version, *rows)
+    size = write_snapshot(catalogue, path)
+    return {**catalogue.stats(), "file_mb": round(size / 2**20, 1)}
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Export the grade catalogue to a read-only SQLite snapshot.")
+    parser.add_argument('--output', default=SNAPSHOT_PATH, help="Snapshot path (default: SNAPSHOT_PATH).")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        logger.error("FATAL: DATABASE_URL environment variable not set.")
+        exit(1)
+
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    started = time.perf_counter()
+    stats = asyncio.run(export_snapshot(database_url, args.output))
+    logger.info(
+        f"Wrote {args.output}: {stats['courses']:,} courses, {stats['instructors']:,} instructors, "
+        f"{stats['offerings']:,} offerings, {stats['file_mb']} MB, in {time.perf_counter() - started:.2f}s."
+    )
+
+
+if __name__ == "__main__":
+    main()
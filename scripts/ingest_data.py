@@ -1,10 +1,20 @@
+import argparse
 import asyncio
+import hashlib
+import json
 import os
 import sys
+import time
 import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Iterator, Optional
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
-from sqlalchemy import delete
+from sqlalchemy import delete, select, text, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.schema import CreateTable, CreateIndex
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import insert as pg_insert
@@ -13,6 +23,7 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 #Add the project root to the path so we can import the 'api' module
 sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
 from api import models
+from api.cache import GradeCache, warm_grade_caches
 
 #Configuration
 #Group all settings in one place for easy management
@@ -22,6 +33,11 @@ class Config:
     DATABASE_URL = os.getenv("DATABASE_URL")
     CSV_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'courses_with_fileids.csv')
 
+    #Columnar inputs are recognised by extension; anything else is read as CSV
+    PARQUET_EXTENSIONS = ('.parquet', '.pq')
+    ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+    SOURCE_EXTENSIONS = ('.csv', *PARQUET_EXTENSIONS, *ARROW_EXTENSIONS)
+
     #Column names from the CSV file
     COURSE_CODE_COL = 'Course'
     COURSE_TITLE_COL = 'course title'
@@ -34,39 +50,238 @@ class Config:
     FIRST_GRADE_COL = 'D+'
     LAST_GRADE_COL = 'S^'
 
+    #Numeric offering columns and the model fields they map to
+    COUNT_COLS = {
+        'Total Registered': 'total_registered',
+        'Current Registered': 'current_registered',
+        'Total Drop': 'total_drop',
+        'Accepted Drop': 'accepted_drop',
+    }
+
+    #Ingestion modes: 'row' upserts one CSV row at a time, 'bulk' COPYs into staging tables,
+    #'incremental' only applies offerings whose source fingerprint changed,
+    #'stream' reads and commits the CSV in chunks with a resumable checkpoint,
+    #'shadow' builds the dataset in a separate schema and swaps it in atomically,
+    #'parallel' merges course-code partitions concurrently over several connections,
+    #'directory' ingests every grade sheet in a folder that hasn't been ingested before
+    DEFAULT_MODE = 'row'
+    PARALLEL_WORKERS = 4
+    DIRECTORY_CONCURRENCY = 4
+    STREAM_CHUNK_SIZE = 5000
+    NA_VALUES = ['', 'NA', '#N/A', 'NaN', 'NULL']
+    SHADOW_SCHEMA = 'ingest_shadow'
+    RETIRED_SCHEMA = 'ingest_retired'
+    SWAP_LOCK_TIMEOUT = '5s'
+
 #Logging Setup
 logging.basicConfig(level=Config.LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 #Database Setup
+#The engine is only created when a URL is configured, so the parsing helpers
+#can be imported (e.g. by the benchmarks) without a database.
 load_dotenv(dotenv_path=Config.DOTENV_PATH)
-if not Config.DATABASE_URL:
-    logger.error("FATAL: DATABASE_URL environment variable not set.")
-    exit(1)
-engine = create_async_engine(Config.DATABASE_URL)
+engine = create_async_engine(Config.DATABASE_URL) if Config.DATABASE_URL else None
 AsyncSessionFactory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+#Profiling
+#With --profile, the time spent in each phase is summed across every call (chunks, rows, partitions).
+#Concurrent modes (parallel, directory) overlap their phases, so the sum can exceed the wall time.
 
-#Helper Functions for Data Cleaning
+class PhaseProfiler:
+    """Accumulates wall time per ingest phase. Does nothing unless enabled."""
 
-def parse_int(value: any, default: int = 0) -> int:
-    """Safely converts a value from a DataFrame to an integer."""
-    if pd.isna(value):
-        return default
-    try:
+    def __init__(self):
+        self.enabled = False
+        self.timings = {} # phase -> seconds, in the order phases first ran
+        self.calls = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def report(self, total_s: float) -> str:
+        """Formats the per-phase timings and the process's peak memory as a table."""
+        lines = [f"{'phase':<24}{'seconds':>10}{'share':>8}{'calls':>9}"]
+        for name, seconds in self.timings.items():
+            share = seconds / total_s * 100 if total_s > 0 else 0
+            lines.append(f"{name:<24}{seconds:>10.3f}{share:>7.1f}%{self.calls[name]:>9}")
+        lines.append(f"{'total':<24}{total_s:>10.3f}")
+        lines.append(f"peak memory (max RSS): {peak_memory_mb():.1f} MiB")
+        return "\n".join(lines)
+
+
+def peak_memory_mb() -> float:
+    """The process's peak resident set size so far, in MiB."""
+    import resource # POSIX only, so imported when a profile is actually reported
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+profiler = PhaseProfiler()
+
+
+#Vectorized Normalization
+#All cleaning happens once over the whole frame, before any DB work:
+#offerings stay one row per CSV row (their grades as the dense grade_counts vector), instructors are
+#exploded into a long frame, and grade columns the vector has no slot for are melted into one;
+#the long frames share the CSV row position (row_no) as their key.
+
+UNKNOWN_INSTRUCTOR = "Unknown Instructor"
+
+
+@dataclass
+class NormalizedFrame:
+    """The cleaned dataset: one row per offering plus long-format instructor and leftover-grade frames."""
+    offerings: pd.DataFrame  # row_no, course_code, course_title, academic_year, semester, counts, plot_file_id, source_hash, grade_counts, term_key
+    instructors: pd.DataFrame  # row_no, instructor_name
+    grades: pd.DataFrame  # row_no, grade_type, count; only grades outside models.GRADE_TYPES
+
+    def subset(self, row_nos) -> "NormalizedFrame":
+        """Returns only the given offerings (by row_no) along with their instructors and grades."""
+        row_nos = pd.Index(row_nos)
+        return NormalizedFrame(
+            offerings=self.offerings[self.offerings['row_no'].isin(row_nos)],
+            instructors=self.instructors[self.instructors['row_no'].isin(row_nos)],
+            grades=self.grades[self.grades['row_no'].isin(row_nos)],
+        )
+
+    def iter_parsed(self):
+        """Yields one dict per offering, for the row-by-row ingest path."""
+        names_by_row = self.instructors.groupby('row_no')['instructor_name'].agg(list).to_dict()
+        grades_by_row = {
+            row_no: dict(zip(group['grade_type'], group['count']))
+            for row_no, group in self.grades.groupby('row_no')
+        }
+        for rec in self.offerings.astype(object).to_dict('records'):
+            row_no = rec.pop('row_no')
+            course_title = rec.pop('course_title')
+            yield {
+                'row_no': row_no,
+                'course_title': course_title,
+                'instructor_names': names_by_row.get(row_no, [UNKNOWN_INSTRUCTOR]),
+                'offering': rec,
+                'grades': {k: int(v) for k, v in grades_by_row.get(row_no, {}).items()},
+            }
+
+
+def _clean_text(series: pd.Series) -> pd.Series:
+    """Strips a text column, turning NaN and blank cells into None."""
+    cleaned = series.astype(object).where(series.notna(), None)
+    cleaned = cleaned.map(str, na_action='ignore').str.strip()
+    return cleaned.where(cleaned.notna() & (cleaned != ''), None)
+
+
+def _to_int(frame: pd.DataFrame) -> pd.DataFrame:
+    """Coerces whole columns to integers; anything unparsable or missing becomes 0."""
+    return frame.apply(pd.to_numeric, errors='coerce').fillna(0).astype('int64')
 
-        #pd.to_numeric is great for handling various string/number formats
-        numeric_val = pd.to_numeric(value, errors='coerce')
-        return default if pd.isna(numeric_val) else int(numeric_val)
-    except (ValueError, TypeError):
-        return default
 
+def normalize_frame(df: pd.DataFrame, grade_cols: list) -> NormalizedFrame:
+    """
+    Cleans the raw grade sheet in a handful of column-wide operations.
+    Rows without a course code are dropped; rows repeating an offering's
+    (course, year, semester) key collapse to the last one, so every offering is ingested once.
+    """
+    course_code = _clean_text(df[Config.COURSE_CODE_COL]).str.upper()
+    missing = course_code.isna()
+    if missing.any():
+        lines = [str(i + 2) for i in df.index[missing]]
+        logger.warning(f"Skipping {len(lines)} rows with a missing course code "
+                       f"(CSV lines {', '.join(lines[:10])}{'...' if len(lines) > 10 else ''}).")
 
-def normalize_name(name: any, default: str = "Unknown Instructor") -> str:
-    """Cleans up an instructor's name."""
-    if pd.isna(name) or not str(name).strip():
-        return default
-    return str(name).strip().title()
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+    offerings = pd.DataFrame({
+        'row_no': df.index.astype('int64'),
+        'course_code': course_code,
+        'course_title': _clean_text(column(Config.COURSE_TITLE_COL)).fillna(course_code),
+        'academic_year': _clean_text(column(Config.YEAR_COL)).fillna('0000-00'),
+        'semester': _clean_text(column(Config.SEMESTER_COL)).fillna('N/A'),
+    }, index=df.index)
+    count_frame = _to_int(df.reindex(columns=list(Config.COUNT_COLS)))
+    for col, field_name in Config.COUNT_COLS.items():
+        offerings[field_name] = count_frame[col]
+    offerings['plot_file_id'] = _clean_text(column(Config.FILE_ID_COL))
+
+    offerings = offerings[~missing].drop_duplicates(subset=['course_code', 'academic_year', 'semester'], keep='last')
+    kept = df.index.isin(offerings.index)
+
+    # Instructors: split the comma list, explode to one row per name, title-case, dedupe per row
+    names = _clean_text(column(Config.INSTRUCTOR_COL)[kept]).str.split(',').explode().str.strip()
+    names = names[names.notna() & (names != '')].str.title()
+    instructors = (pd.DataFrame({'row_no': names.index.astype('int64'), 'instructor_name': names.to_numpy()})
+                   .drop_duplicates()
+                   .sort_values(['row_no', 'instructor_name'], kind='stable'))
+    without_names = offerings.index.difference(pd.Index(instructors['row_no']))
+    if len(without_names):
+        instructors = pd.concat([instructors, pd.DataFrame({
+            'row_no': without_names.astype('int64'), 'instructor_name': UNKNOWN_INSTRUCTOR,
+        })], ignore_index=True).sort_values(['row_no', 'instructor_name'], kind='stable')
+
+    matrix = _to_int(df.loc[kept, grade_cols]).to_numpy()
+    grade_names = np.array([str(col).strip() for col in grade_cols], dtype=object)
+    offerings['source_hash'] = fingerprint(offerings, instructors, matrix, df.index[kept])
+
+    # Grades: a dense vector per offering, in the models' canonical GRADE_TYPES order
+    position = {name: i for i, name in enumerate(grade_names)}
+    unknown = [name for name in position if name not in models.GRADE_TYPES]
+    if unknown:
+        logger.warning(f"Grade columns {', '.join(unknown)} are not in models.GRADE_TYPES: their counts are stored "
+                       f"in the grades table instead of grade_counts, so reports read from it won't show them.")
+    # Only those columns are melted to (row_no, grade_type, count) rows for the grades table, non-zero cells only
+    unknown_cols = np.isin(grade_names, unknown)
+    rows, cols = np.nonzero((matrix > 0) & unknown_cols)
+    grades = pd.DataFrame({
+        'row_no': df.index[kept].to_numpy(dtype='int64')[rows],
+        'grade_type': grade_names[cols],
+        'count': matrix[rows, cols],
+    })
+    dense = np.zeros((len(matrix), len(models.GRADE_TYPES)), dtype='int64')
+    for i, grade_type in enumerate(models.GRADE_TYPES):
+        if grade_type in position:
+            dense[:, i] = matrix[:, position[grade_type]].clip(min=0)
+    offerings['grade_counts'] = pd.Series(dense.tolist(), index=offerings.index, dtype=object)
+    offerings['term_key'] = term_keys(offerings['academic_year'], offerings['semester'])
+    return NormalizedFrame(offerings=offerings.reset_index(drop=True),
+                           instructors=instructors.reset_index(drop=True),
+                           grades=grades)
+
+
+def term_keys(academic_year: pd.Series, semester: pd.Series) -> pd.Series:
+    """
+    Sortable integer terms: first year of the academic year * 10 + the semester's ordinal.
+    An unparsable year or unknown semester contributes 0, so such rows sort as the oldest.
+    """
+    first_year = pd.to_numeric(academic_year.str.extract(r'^(\d{4})', expand=False), errors='coerce').fillna(0)
+    ordinal = semester.str.lower().map(models.SEMESTER_ORDINALS).fillna(0)
+    return (first_year * 10 + ordinal).astype('int64')
+
+
+def fingerprint(offerings: pd.DataFrame, instructors: pd.DataFrame, grade_matrix: np.ndarray, matrix_index) -> pd.Series:
+    """
+    Hashes every offering's normalized columns, instructor list and grade counts in one pass,
+    so unchanged offerings can be skipped on re-ingest. Returns hex digests aligned with `offerings`.
+    """
+    # Instructor names are deduped per row, so summing their hashes gives an order-independent set hash
+    name_hashes = pd.Series(pd.util.hash_pandas_object(instructors['instructor_name'], index=False).to_numpy(),
+                            index=instructors['row_no'].to_numpy())
+    canonical = offerings.drop(columns=['row_no'])
+    canonical['instructors'] = name_hashes.groupby(level=0).sum().reindex(offerings.index, fill_value=0).to_numpy()
+    grade_frame = pd.DataFrame(grade_matrix, index=matrix_index).reindex(offerings.index)
+    canonical = pd.concat([canonical, grade_frame.add_prefix('g')], axis=1)
+    hashes = pd.util.hash_pandas_object(canonical, index=False)
+    return hashes.map('{:016x}'.format)
 
 
 #Core Data Processing Functions
@@ -74,123 +289,919 @@ def normalize_name(name: any, default: str = "Unknown Instructor") -> str:
 async def clear_existing_data(session: AsyncSession):
     """Clears out tables before ingesting new data."""
     logger.warning("Clearing existing grades, offering associations, and offerings...")
-    await session.execute(delete(models.Grade))
-    await session.execute(delete(models.offering_instructor_association))
-    await session.execute(delete(models.Offering))
+    with profiler.phase('clear'):
+        await session.execute(delete(models.Grade))
+        await session.execute(delete(models.offering_instructor_association))
+        await session.execute(delete(models.Offering))
     logger.info("Dependent tables cleared.")
 
 
-async def process_row(session: AsyncSession, row: pd.Series, grade_cols: list):
-    """Processes a single row from the DataFrame to update the database."""
-    
-    # 1. Upsert Course
-    course_code = str(row.get(Config.COURSE_CODE_COL, '')).strip().upper()
+async def process_row(session: AsyncSession, parsed: dict):
+    """Processes a single normalized offering to update the database."""
+    offering_data = parsed['offering']
+
+    with profiler.phase('instructor resolution'):
+        # 1. Upsert Course
+        course_stmt = pg_insert(models.Course).values(code=offering_data['course_code'], name=parsed['course_title'])
+        course_stmt = course_stmt.on_conflict_do_update(index_elements=['code'], set_={'name': course_stmt.excluded.name}).returning(models.Course)
+        (await session.execute(course_stmt)).scalar_one()
 
-    if not course_code:
-        logger.warning(f"Skipping row {row.name+2}: Course code is missing.")
-        return False
+        # 2. Upsert Instructors
+        instructor_ids = []
+        for name in parsed['instructor_names']:
 
-    course_title_raw = row.get(Config.COURSE_TITLE_COL)
+            instr_stmt = pg_insert(models.Instructor).values(name=name)
+            instr_stmt = instr_stmt.on_conflict_do_nothing(index_elements=['name']).returning(models.Instructor.id)
+            # We need to fetch in case the conflict was "do nothing"
+            instructor_id = (await session.execute(instr_stmt)).scalar()
+            if not instructor_id:
+                instructor_id = (await session.execute(select(models.Instructor.id).where(models.Instructor.name == name))).scalar_one()
+            instructor_ids.append(instructor_id)
 
-    course_title = str(course_title_raw).strip() if pd.notna(course_title_raw) else course_code
+    # 3. Upsert Offering
+    with profiler.phase('offering upsert'):
+        offering_stmt = pg_insert(models.Offering).values(**offering_data)
+        update_cols = {k: v for k, v in offering_data.items() if k not in ['course_code', 'academic_year', 'semester']}
+        offering_stmt = offering_stmt.on_conflict_do_update(index_elements=['course_code', 'academic_year', 'semester'], set_=update_cols).returning(models.Offering.id)
+        offering_id = (await session.execute(offering_stmt)).scalar_one()
     
-    course_stmt = pg_insert(models.Course).values(code=course_code, name=course_title)
-    course_stmt = course_stmt.on_conflict_do_update(index_elements=['code'], set_={'name': course_stmt.excluded.name}).returning(models.Course)
-    course = (await session.execute(course_stmt)).scalar_one()
 
-    # 2. Upsert Instructors
+    # 4. Link Instructors to Offering and Insert Grades
+    # Written as plain rows: assigning the ORM relationship would lazy-load it, which async sessions can't do
+    with profiler.phase('grade insert'):
+        association = models.offering_instructor_association
+        await session.execute(delete(association).where(association.c.offering_id == offering_id))
+        await session.execute(pg_insert(association).values(
+            [{'offering_id': offering_id, 'instructor_id': instructor_id} for instructor_id in instructor_ids]
+        ).on_conflict_do_nothing())
+    
 
-    instructor_names_raw = row.get(Config.INSTRUCTOR_COL)
+        grades_to_insert = [
+            {'offering_id': offering_id, 'grade_type': grade_type, 'count': count}
+            for grade_type, count in parsed['grades'].items()
+        ]
+        if grades_to_insert:
+            await session.execute(pg_insert(models.Grade).values(grades_to_insert).on_conflict_do_nothing())
+        
+    return True
 
-    raw_list = str(instructor_names_raw).split(',') if pd.notna(instructor_names_raw) else []
-    instructor_names = sorted(list(set(normalize_name(name) for name in raw_list)))
-    if not instructor_names:
-        instructor_names.append("Unknown Instructor")
-    
-    instructors = []
-    for name in instructor_names:
 
-        instr_stmt = pg_insert(models.Instructor).values(name=name)
-        instr_stmt = instr_stmt.on_conflict_do_nothing(index_elements=['name']).returning(models.Instructor)
-        # We need to fetch in case the conflict was "do nothing"
-        instructor = (await session.execute(instr_stmt)).scalar()
-        if not instructor:
-            instructor = (await session.execute(models.Instructor.__table__.select().where(models.Instructor.name == name))).scalar()
-        instructors.append(instructor)
+#Input Sources
+#CSV is parsed as text; Parquet and Arrow IPC (Feather v2) are read column-pruned, so only the columns
+#the ingest uses are ever materialized. Stream mode decodes Parquet a batch at a time and maps Arrow IPC.
 
-    # 3. Upsert Offering
+def find_grade_cols(columns) -> list:
+    """Returns the grade columns, i.e. everything from FIRST_GRADE_COL to LAST_GRADE_COL. Raises ValueError if missing."""
+    cols = list(columns)
+    start_idx = cols.index(Config.FIRST_GRADE_COL)
+    end_idx = cols.index(Config.LAST_GRADE_COL)
+    return cols[start_idx : end_idx + 1]
 
-    offering_data = {
-        'course_code': course.code,
-        'academic_year': str(row.get(Config.YEAR_COL, '0000-00')).strip(),
-        'semester': str(row.get(Config.SEMESTER_COL, 'N/A')).strip(),
-        'total_registered': parse_int(row.get('Total Registered')),
-        'current_registered': parse_int(row.get('Current Registered')),
-        'total_drop': parse_int(row.get('Total Drop')),
-        'accepted_drop': parse_int(row.get('Accepted Drop')),
-        'plot_file_id': str(row.get(Config.FILE_ID_COL)).strip() if pd.notna(row.get(Config.FILE_ID_COL)) else None
-    }
-    
 
-    offering_stmt = pg_insert(models.Offering).values(**offering_data)
-    update_cols = {k: v for k, v in offering_data.items() if k not in ['course_code', 'academic_year', 'semester']}
-    offering_stmt = offering_stmt.on_conflict_do_update(index_elements=['course_code', 'academic_year', 'semester'], set_=update_cols).returning(models.Offering)
-    offering = (await session.execute(offering_stmt)).scalar_one()
-    
+def source_format(path: str) -> str:
+    """Returns 'parquet', 'arrow' or 'csv' based on the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in Config.PARQUET_EXTENSIONS:
+        return 'parquet'
+    if ext in Config.ARROW_EXTENSIONS:
+        return 'arrow'
+    return 'csv'
 
-    # 4. Link Instructors to Offering and Insert Grades
-    offering.instructors = instructors  # Update the relationship
-    
 
-    grades_to_insert = [
-        {'offering_id': offering.id, 'grade_type': str(col).strip(), 'count': parse_int(row.get(col))}
-        for col in grade_cols if parse_int(row.get(col)) > 0
-    ]
-    if grades_to_insert:
-        await session.execute(pg_insert(models.Grade).values(grades_to_insert).on_conflict_do_nothing())
-        
-    return True
+def needed_columns(names: list) -> list:
+    """The subset of a file's columns the ingest reads, kept in file order so the grade range stays contiguous."""
+    grade_cols = set(find_grade_cols(names))
+    wanted = {
+        Config.COURSE_CODE_COL, Config.COURSE_TITLE_COL, Config.INSTRUCTOR_COL,
+        Config.YEAR_COL, Config.SEMESTER_COL, Config.FILE_ID_COL, *Config.COUNT_COLS,
+    }
+    return [name for name in names if name in wanted or name in grade_cols]
 
 
-# --- Main Execution ---
-async def main():
-    """Main function to run the data ingestion process."""
-    logger.info(f"Starting data ingestion from: {Config.CSV_PATH}")
-    
+def _import_pyarrow():
     try:
-        df = pd.read_csv(Config.CSV_PATH, na_values=['', 'NA', '#N/A', 'NaN', 'NULL'], keep_default_na=True)
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed')] # Drop unnamed columns
-        logger.info(f"Loaded {len(df)} rows from CSV.")
-    except FileNotFoundError:
-        logger.error(f"FATAL: CSV file not found at {Config.CSV_PATH}.")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading Parquet/Arrow input requires pyarrow (pip install pyarrow).")
+    return pa, pq
+
+
+def _open_arrow_table(path: str, fmt: str):
+    """Reads a Parquet file column-pruned, or opens an Arrow IPC file memory-mapped, as a pyarrow Table."""
+    pa, pq = _import_pyarrow()
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    if fmt == 'parquet':
+        columns = needed_columns(pq.read_schema(path).names)
+        return pq.read_table(path, columns=columns)
+    # IPC record batches are used in place from the mapping: no parsing and no copy until to_pandas()
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table.select(needed_columns(table.column_names))
+
+
+def _iter_parquet_batches(path: str, chunk_size: int, offset: int):
+    """
+    Yields (first row number, record batch) pairs of at most `chunk_size` rows, starting `offset` rows in.
+    Parquet has to be decoded to be read, so only the batch in hand is ever in memory,
+    and row groups that end before the offset are not read at all.
+    """
+    _, pq = _import_pyarrow()
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    parquet_file = pq.ParquetFile(path)
+    position, row_groups = 0, []
+    for i in range(parquet_file.num_row_groups):
+        group_rows = parquet_file.metadata.row_group(i).num_rows
+        if not row_groups and position + group_rows <= offset:
+            position += group_rows
+            continue
+        row_groups.append(i)
+    if not row_groups:
         return
 
-    # Identify the grade columns dynamically
-    try:
-        cols = df.columns.tolist()
-        start_idx = cols.index(Config.FIRST_GRADE_COL)
-        end_idx = cols.index(Config.LAST_GRADE_COL)
-        grade_cols = cols[start_idx : end_idx + 1]
-        logger.info(f"Identified {len(grade_cols)} grade columns to process.")
-    except ValueError:
-        logger.error("FATAL: Could not find start/end grade columns in the CSV.")
+    columns = needed_columns(parquet_file.schema_arrow.names)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, row_groups=row_groups, columns=columns):
+        if position + batch.num_rows <= offset:
+            position += batch.num_rows
+            continue
+        if position < offset:
+            batch = batch.slice(offset - position)
+            position = offset
+        yield position, batch
+        position += batch.num_rows
+
+
+def read_source(path: str) -> pd.DataFrame:
+    """Reads a whole grade sheet from CSV, Parquet or Arrow IPC into a DataFrame."""
+    fmt = source_format(path)
+    with profiler.phase('parse'):
+        if fmt == 'csv':
+            df = pd.read_csv(path, na_values=Config.NA_VALUES, keep_default_na=True)
+            return df.loc[:, ~df.columns.str.contains('^Unnamed')] # Drop unnamed columns
+        return _open_arrow_table(path, fmt).to_pandas()
+
+
+def iter_source_chunks(path: str, chunk_size: int, offset: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Yields the grade sheet at most `chunk_size` rows at a time, starting `offset` rows in.
+    Each chunk's index holds its file-relative row numbers.
+    """
+    fmt = source_format(path)
+    if fmt == 'csv':
+        # Rows before the offset are skipped by the parser itself
+        reader = pd.read_csv(path, na_values=Config.NA_VALUES, keep_default_na=True,
+                             chunksize=chunk_size, skiprows=range(1, offset + 1))
+        with reader:
+            while True:
+                with profiler.phase('parse'):
+                    chunk = next(reader, None)
+                if chunk is None:
+                    return
+                chunk = chunk.loc[:, ~chunk.columns.str.contains('^Unnamed')]
+                chunk.index = chunk.index + offset
+                yield chunk
+
+    if fmt == 'parquet':
+        batches = _iter_parquet_batches(path, chunk_size, offset)
+        while True:
+            with profiler.phase('parse'):
+                item = next(batches, None)
+                if item is None:
+                    return
+                start, batch = item
+                chunk = batch.to_pandas()
+            chunk.index = chunk.index + start
+            yield chunk
+
+    # Arrow IPC is used in place from the mapping: only the slice being converted is copied
+    table = _open_arrow_table(path, fmt)
+    for start in range(offset, table.num_rows, chunk_size):
+        with profiler.phase('parse'):
+            chunk = table.slice(start, chunk_size).to_pandas()
+        chunk.index = chunk.index + start
+        yield chunk
+
+
+#Bulk Mode: COPY into staging tables, then set-based merges
+
+# Unlogged tables skip the WAL, which makes them much cheaper to fill and throw away.
+# Rows are keyed by their position in the source (row_no) so the three tables can be joined back together.
+STAGING_TABLES = {
+    'stg_offerings': """(
+        row_no INTEGER PRIMARY KEY,
+        course_code VARCHAR(20) NOT NULL,
+        course_title VARCHAR(255),
+        academic_year VARCHAR(10) NOT NULL,
+        semester VARCHAR(10) NOT NULL,
+        total_registered INTEGER,
+        current_registered INTEGER,
+        total_drop INTEGER,
+        accepted_drop INTEGER,
+        plot_file_id VARCHAR(255),
+        source_hash VARCHAR(64),
+        grade_counts INTEGER[],
+        term_key INTEGER
+    )""",
+    'stg_offering_instructors': """(
+        row_no INTEGER NOT NULL,
+        instructor_name VARCHAR(255) NOT NULL
+    )""",
+    'stg_grades': """(
+        row_no INTEGER NOT NULL,
+        grade_type VARCHAR(10) NOT NULL,
+        count INTEGER NOT NULL
+    )""",
+}
+
+
+def staging_ddl() -> list:
+    """
+    Statements that create empty staging tables. They are temporary: private to the connection
+    and dropped when the transaction that loads and merges them commits, so nothing is left behind
+    and concurrent loaders (parallel and directory modes) each get their own set under the same names.
+    """
+    return [f"CREATE TEMP TABLE {name} {columns} ON COMMIT DROP" for name, columns in STAGING_TABLES.items()]
+
+
+STAGING_OFFERING_COLS = [
+    'row_no', 'course_code', 'course_title', 'academic_year', 'semester',
+    'total_registered', 'current_registered', 'total_drop', 'accepted_drop', 'plot_file_id', 'source_hash',
+    'grade_counts', 'term_key',
+]
+
+# Each statement handles one target table for the whole dataset.
+MERGE_SQL = [
+    # Courses: the last row for a code decides its title
+    """INSERT INTO courses (code, name)
+       SELECT DISTINCT ON (course_code) course_code, course_title
+       FROM stg_offerings ORDER BY course_code, row_no DESC
+       ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name""",
+    # Instructors: only names we haven't seen before
+    """INSERT INTO instructors (name)
+       SELECT DISTINCT instructor_name FROM stg_offering_instructors
+       ON CONFLICT (name) DO NOTHING""",
+    # Offerings
+    """INSERT INTO offerings (course_code, academic_year, semester, total_registered,
+                              current_registered, total_drop, accepted_drop, plot_file_id, source_hash, grade_counts, term_key)
+       SELECT course_code, academic_year, semester, total_registered,
+              current_registered, total_drop, accepted_drop, plot_file_id, source_hash, grade_counts, term_key
+       FROM stg_offerings
+       ON CONFLICT (course_code, academic_year, semester) DO UPDATE SET
+           total_registered = EXCLUDED.total_registered,
+           current_registered = EXCLUDED.current_registered,
+           total_drop = EXCLUDED.total_drop,
+           accepted_drop = EXCLUDED.accepted_drop,
+           plot_file_id = EXCLUDED.plot_file_id,
+           source_hash = EXCLUDED.source_hash,
+           grade_counts = EXCLUDED.grade_counts,
+           term_key = EXCLUDED.term_key""",
+    # Offering <-> instructor links
+    """INSERT INTO offering_instructors (offering_id, instructor_id)
+       SELECT DISTINCT o.id, i.id
+       FROM stg_offering_instructors si
+       JOIN stg_offerings so ON so.row_no = si.row_no
+       JOIN offerings o ON o.course_code = so.course_code AND o.academic_year = so.academic_year AND o.semester = so.semester
+       JOIN instructors i ON i.name = si.instructor_name
+       ON CONFLICT DO NOTHING""",
+    # Grades
+    """INSERT INTO grades (offering_id, grade_type, count)
+       SELECT o.id, sg.grade_type, sg.count
+       FROM stg_grades sg
+       JOIN stg_offerings so ON so.row_no = sg.row_no
+       JOIN offerings o ON o.course_code = so.course_code AND o.academic_year = so.academic_year AND o.semester = so.semester
+       ON CONFLICT DO NOTHING""",
+]
+
+# Incremental mode updates changed offerings in place, so their old links and grades
+# have to go before MERGE_SQL re-inserts them. Runs right after the offerings upsert.
+REPLACE_CHILDREN_SQL = [
+    """DELETE FROM offering_instructors oi
+       USING stg_offerings so JOIN offerings o
+           ON o.course_code = so.course_code AND o.academic_year = so.academic_year AND o.semester = so.semester
+       WHERE oi.offering_id = o.id""",
+    """DELETE FROM grades g
+       USING stg_offerings so JOIN offerings o
+           ON o.course_code = so.course_code AND o.academic_year = so.academic_year AND o.semester = so.semester
+       WHERE g.offering_id = o.id""",
+]
+
+
+def _records(frame: pd.DataFrame, columns: list) -> list:
+    """Converts frame columns to plain-Python tuples (no NumPy scalars or NaN) for COPY."""
+    subset = frame[columns].astype(object)
+    return list(subset.where(subset.notna(), None).itertuples(index=False, name=None))
+
+
+def build_staging_records(normalized: NormalizedFrame) -> tuple[list, list, list]:
+    """Turns the normalized frames into record tuples for the three staging tables."""
+    return (
+        _records(normalized.offerings, STAGING_OFFERING_COLS),
+        _records(normalized.instructors, ['row_no', 'instructor_name']),
+        _records(normalized.grades, ['row_no', 'grade_type', 'count']),
+    )
+
+
+async def copy_records(session: AsyncSession, table: str, records: list, columns: list):
+    """Streams records into a table with COPY over the session's underlying asyncpg connection."""
+    if not records:
         return
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
+
+async def load_staging(session: AsyncSession, normalized: NormalizedFrame) -> int:
+    """
+    Creates the staging tables and fills them with COPY. Returns the number of staged offerings.
+    The tables only last until the session's transaction commits, so the merge has to run in it too.
+    """
+    offering_recs, instructor_recs, grade_recs = build_staging_records(normalized)
+    logger.info(f"Prepared {len(offering_recs)} offerings, {len(instructor_recs)} instructor links "
+                f"and {len(grade_recs)} grade counts for staging.")
+
+    with profiler.phase('staging copy'):
+        for ddl in staging_ddl():
+            await session.execute(text(ddl))
+
+        await copy_records(session, 'stg_offerings', offering_recs, STAGING_OFFERING_COLS)
+        await copy_records(session, 'stg_offering_instructors', instructor_recs, ['row_no', 'instructor_name'])
+        await copy_records(session, 'stg_grades', grade_recs, ['row_no', 'grade_type', 'count'])
+    logger.info("Staging tables loaded via COPY.")
+    return len(offering_recs)
+
+
+async def merge_staging(session: AsyncSession, replace_children: bool = False, include_lookups: bool = True):
+    """
+    Runs the set-based merges from the staging tables into the live tables.
+    With `replace_children`, offerings that already existed get their links and grades rewritten
+    instead of merged into, for when the live tables weren't cleared first.
+    Without `include_lookups`, courses and instructors are assumed to be merged already.
+    """
+    courses_sql, instructors_sql, offerings_sql, *children_sql = MERGE_SQL
+    lookups_sql = [courses_sql, instructors_sql] if include_lookups else []
+    pre_children_sql = REPLACE_CHILDREN_SQL if replace_children else []
+    phases = [
+        ('instructor resolution', lookups_sql),
+        ('offering upsert', [offerings_sql, *pre_children_sql]),
+        ('grade insert', children_sql),
+    ]
+    for phase, statements in phases:
+        with profiler.phase(phase):
+            for stmt in statements:
+                await session.execute(text(stmt))
+
+
+async def bulk_ingest(session: AsyncSession, normalized: NormalizedFrame) -> int:
+    """Loads the whole frame into staging tables with COPY and merges it with a handful of statements."""
+    staged = await load_staging(session, normalized)
+
+    logger.info("Merging staging tables into live tables...")
+    await clear_existing_data(session)
+    await merge_staging(session)
+
+    return staged
+
+
+#Incremental Mode: fingerprint rows and only touch offerings that changed
+
+@dataclass
+class ChangeSummary:
+    """What an incremental ingest changed, for targeted cache invalidation downstream."""
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    offering_ids: list = field(default_factory=list) # IDs of added, changed and removed offerings
+    course_codes: list = field(default_factory=list) # Courses whose term lists or reports changed
+
+
+async def incremental_ingest(session: AsyncSession, normalized: NormalizedFrame) -> ChangeSummary:
+    """
+    Compares each row's fingerprint with the stored `source_hash` and applies only the difference:
+    new and changed offerings are upserted through the staging tables, vanished ones are deleted.
+    Rows stored before `term_key`/`grade_counts` existed count as changed, so they get filled in.
+    Offering IDs of untouched rows are preserved.
+    """
+    key_cols = ['course_code', 'academic_year', 'semester']
+    existing_rows = await session.execute(select(
+        models.Offering.course_code, models.Offering.academic_year, models.Offering.semester,
+        models.Offering.id, models.Offering.source_hash,
+        (models.Offering.term_key.is_(None) | models.Offering.grade_counts.is_(None)).label('underived'),
+    ))
+    existing = pd.DataFrame(existing_rows.all(), columns=key_cols + ['offering_id', 'stored_hash', 'underived'])
+
+    delta = normalized.offerings[key_cols + ['row_no', 'source_hash']].merge(existing, on=key_cols, how='outer', indicator=True)
+    added = delta[delta['_merge'] == 'left_only']
+    both = delta[delta['_merge'] == 'both']
+    # The fingerprint covers the source columns only, not the values derived from them
+    changed = both[(both['source_hash'] != both['stored_hash']) | both['underived'].astype(bool)]
+    removed = delta[delta['_merge'] == 'right_only']
+
+    summary = ChangeSummary(
+        added=len(added), changed=len(changed), removed=len(removed),
+        unchanged=len(both) - len(changed),
+    )
+    logger.info(f"Delta: {summary.added} added, {summary.changed} changed, "
+                f"{summary.removed} removed, {summary.unchanged} unchanged.")
+
+    if summary.added or summary.changed:
+        await load_staging(session, normalized.subset(pd.concat([added['row_no'], changed['row_no']])))
+        await merge_staging(session, replace_children=True)
+        new_ids = await session.execute(text(
+            """SELECT o.id FROM offerings o JOIN stg_offerings so
+               ON o.course_code = so.course_code AND o.academic_year = so.academic_year AND o.semester = so.semester"""
+        ))
+        summary.offering_ids.extend(new_ids.scalars().all())
+
+    if summary.removed:
+        removed_ids = [int(i) for i in removed['offering_id']]
+        # Grades and instructor links go with them via ON DELETE CASCADE
+        await session.execute(
+            delete(models.Offering)
+            .where(models.Offering.id == any_(bindparam('removed_ids', value=removed_ids, type_=ARRAY(Integer))))
+            .execution_options(synchronize_session=False)
+        )
+        summary.offering_ids.extend(removed_ids)
+
+    summary.offering_ids = sorted(set(summary.offering_ids))
+    summary.course_codes = sorted(set(pd.concat([added['course_code'], changed['course_code'], removed['course_code']])))
+    return summary
+
+
+#Stream Mode: bounded memory, one transaction per chunk, resumable
+
+def _write_checkpoint(path: str, state: dict):
+    """Writes the checkpoint atomically, so a crash mid-write never leaves a corrupt file behind."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+async def stream_ingest(input_path: str, chunk_size: int, checkpoint_path: str, resume: bool = False) -> tuple[int, int]:
+    """
+    Reads the grade sheet `chunk_size` rows at a time and normalizes, stages and merges each chunk in its own
+    transaction, so peak memory depends on the chunk size rather than the file and a failure only loses
+    the chunk in flight. After every commit the position is saved to `checkpoint_path`; with `resume`,
+    a previous run picks up from there instead of wiping the tables again.
+    Returns (rows read, offerings upserted).
+    """
+    state = {'input': os.path.abspath(input_path), 'chunk_size': chunk_size,
+             'next_chunk': 0, 'rows_read': 0, 'successful_rows': 0}
+
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            saved = json.load(f)
+        if (saved.get('input'), saved.get('chunk_size')) != (state['input'], chunk_size):
+            raise ValueError(f"Checkpoint {checkpoint_path} was written for {saved.get('input')} "
+                             f"with chunk size {saved.get('chunk_size')}; refusing to resume.")
+        state = saved
+        logger.info(f"Resuming from chunk {state['next_chunk']} ({state['rows_read']} rows already committed).")
+    else:
+        async with AsyncSessionFactory() as session:
+            async with session.begin():
+                await clear_existing_data(session)
+        _write_checkpoint(checkpoint_path, state)
+
+    grade_cols = None
+    for chunk in iter_source_chunks(input_path, chunk_size, offset=state['rows_read']):
+        grade_cols = grade_cols or find_grade_cols(chunk.columns)
+        with profiler.phase('normalize'):
+            normalized = normalize_frame(chunk, grade_cols)
+
+        async with AsyncSessionFactory() as session:
+            async with session.begin(): # One transaction per chunk
+                staged = await load_staging(session, normalized)
+                await merge_staging(session, replace_children=True)
+
+        state['next_chunk'] += 1
+        state['rows_read'] += len(chunk)
+        state['successful_rows'] += staged
+        _write_checkpoint(checkpoint_path, state)
+        logger.info(f"Committed chunk {state['next_chunk']} ({state['rows_read']} rows read so far).")
+
+    os.remove(checkpoint_path)
+    return state['rows_read'], state['successful_rows']
+
+
+#Shadow Mode: build the new catalogue off to the side, then swap it in with a rename
+
+# Everything a grade lookup reads, in dependency order
+SWAP_TABLES = [
+    models.Course.__table__,
+    models.Instructor.__table__,
+    models.Offering.__table__,
+    models.offering_instructor_association,
+    models.Grade.__table__,
+]
+
+
+async def shadow_ingest(normalized: NormalizedFrame) -> int:
+    """
+    Builds the complete catalogue in SHADOW_SCHEMA while the live tables keep serving reads untouched:
+    create the tables, COPY and merge the data, then build indexes and statistics on the full tables.
+    The swap itself only moves the live tables to RETIRED_SCHEMA and the shadow ones into `public`,
+    a metadata-only change, so readers wait milliseconds at most and never see a half-loaded state.
+    """
+    shadow, retired = Config.SHADOW_SCHEMA, Config.RETIRED_SCHEMA
+    table_names = [table.name for table in SWAP_TABLES]
 
-    successful_rows = 0
     async with AsyncSessionFactory() as session:
-        async with session.begin(): # A single transaction for the whole process
+        async with session.begin():
+            await session.execute(text(f"DROP SCHEMA IF EXISTS {shadow} CASCADE"))
+            await session.execute(text(f"CREATE SCHEMA {shadow}"))
+            # Unqualified names (tables, foreign keys, staging, MERGE_SQL) now resolve to the shadow schema
+            await session.execute(text(f"SET LOCAL search_path TO {shadow}, public"))
+            for table in SWAP_TABLES:
+                await session.execute(CreateTable(table))
+                # Unique indexes back the merges' ON CONFLICT clauses, so they must exist up front
+                for index in table.indexes:
+                    if index.unique:
+                        await session.execute(CreateIndex(index))
+
+            staged = await load_staging(session, normalized)
+            await merge_staging(session)
+
+            # Secondary indexes are cheaper to build once over the loaded tables than to maintain row by row
+            logger.info("Shadow tables loaded. Building indexes...")
+            for table in SWAP_TABLES:
+                for index in table.indexes:
+                    if not index.unique:
+                        await session.execute(CreateIndex(index))
+            await session.execute(text(f"ANALYZE {', '.join(table_names)}"))
+            # Built here too, so the view is bound to the shadow tables and moves in with them
+            for ddl in models.COURSE_SUMMARY_DDL:
+                await session.execute(text(ddl))
+
+    logger.info("Swapping shadow tables in...")
+    async with AsyncSessionFactory() as session:
+        async with session.begin():
+            # Don't queue behind a long-running reader forever; fail and leave the live tables as they were
+            await session.execute(text(f"SET LOCAL lock_timeout = '{Config.SWAP_LOCK_TIMEOUT}'"))
+            await session.execute(text(f"DROP SCHEMA IF EXISTS {retired} CASCADE"))
+            await session.execute(text(f"CREATE SCHEMA {retired}"))
+            # Left in public, the live view would follow its tables out and be dropped with them
+            await session.execute(text(f"ALTER MATERIALIZED VIEW IF EXISTS public.course_summaries SET SCHEMA {retired}"))
+            for name in table_names:
+                await session.execute(text(f"ALTER TABLE public.{name} SET SCHEMA {retired}"))
+            for name in table_names:
+                await session.execute(text(f"ALTER TABLE {shadow}.{name} SET SCHEMA public"))
+            await session.execute(text(f"ALTER MATERIALIZED VIEW {shadow}.course_summaries SET SCHEMA public"))
+
+    async with AsyncSessionFactory() as session:
+        async with session.begin():
+            await session.execute(text(f"DROP SCHEMA IF EXISTS {retired} CASCADE"))
+            await session.execute(text(f"DROP SCHEMA IF EXISTS {shadow} CASCADE")) # Emptied by the swap
+    logger.info("Swap complete; previous tables dropped.")
+
+    return staged
+
+
+#Parallel Mode: partitions merged concurrently on separate pooled connections
+
+async def _ingest_partition(partition: NormalizedFrame, partition_no: int) -> int:
+    """Stages and merges one partition in its own session, on its own connection."""
+    async with AsyncSessionFactory() as session:
+        async with session.begin():
+            staged = await load_staging(session, partition)
+            await merge_staging(session, include_lookups=False)
+    logger.info(f"Partition {partition_no}: merged {staged} offerings.")
+    return staged
+
+
+async def resolve_lookups(session: AsyncSession, normalized: NormalizedFrame):
+    """Merges just the courses and instructors of a frame, via one-row-per-key temp staging tables."""
+    await load_staging(session, NormalizedFrame(
+        offerings=normalized.offerings.drop_duplicates('course_code', keep='last'),
+        instructors=normalized.instructors.drop_duplicates('instructor_name'),
+        grades=normalized.grades.iloc[0:0],
+    ))
+    courses_sql, instructors_sql, *_ = MERGE_SQL
+    with profiler.phase('instructor resolution'):
+        await session.execute(text(courses_sql))
+        await session.execute(text(instructors_sql))
+
+
+async def parallel_ingest(normalized: NormalizedFrame, workers: int) -> int:
+    """
+    Full reload split across `workers` connections. Courses and instructors, the rows partitions
+    would otherwise contend on, are cleared and resolved first in one bulk step; the offerings are then
+    hash-partitioned by course code, so no two partitions ever touch the same offering or course,
+    and each partition is staged and merged concurrently.
+    Unlike the other full-reload modes this commits per partition, so it is not atomic.
+    """
+    async with AsyncSessionFactory() as session:
+        async with session.begin():
             await clear_existing_data(session)
-            
-            for index, row in df.iterrows():
-                if index % 100 == 0 and index > 0:
-                    logger.info(f"Processing row {index}/{len(df)}...")
-                
-                success = await process_row(session, row, grade_cols)
-                if success:
-                    successful_rows += 1
+            await resolve_lookups(session, normalized)
+    logger.info("Courses and instructors resolved. Merging partitions...")
+
+    codes = normalized.offerings['course_code'].to_numpy()
+    partition_of = pd.util.hash_array(codes) % workers
+    partitions = [
+        normalized.subset(normalized.offerings['row_no'].to_numpy()[partition_of == i])
+        for i in range(workers)
+    ]
+    staged = await asyncio.gather(*[
+        _ingest_partition(partition, i) for i, partition in enumerate(partitions) if len(partition.offerings)
+    ])
+    return sum(staged)
+
+
+
+#Directory Mode: every grade sheet in a folder, skipping files whose checksum was already ingested
+#Files are read and normalized in threads and merged concurrently, each in its own transaction,
+#so one bad file doesn't hold back (or roll back) the others.
+
+# Any constant works; it only has to be the same for every process that merges lookups
+LOOKUP_LOCK_KEY = 0x6772616465 # 'grade'
+
+@dataclass
+class DirectoryReport:
+    files_found: int = 0
+    ingested: int = 0
+    skipped: int = 0
+    failed: int = 0
+    rows: int = 0
+    errors: dict = field(default_factory=dict) # file name -> error message
+
+
+def file_checksum(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_source_files(directory: str) -> list:
+    """The grade sheets directly inside `directory`, in name order."""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(Config.SOURCE_EXTENSIONS) and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+async def ingest_file(session_factory: sessionmaker, path: str, checksum: str) -> int:
+    """
+    Upserts one grade sheet into the live tables and records its checksum, without clearing anything.
+    Returns the number of offerings merged.
+    """
+    df = await asyncio.to_thread(read_source, path)
+    with profiler.phase('normalize'):
+        normalized = await asyncio.to_thread(normalize_frame, df, find_grade_cols(df.columns))
+
+    # Two files adding the same new instructor would otherwise deadlock each other,
+    # so the (short) lookup merge is serialized across all concurrent files and workers
+    async with session_factory() as session:
+        async with session.begin():
+            await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': LOOKUP_LOCK_KEY})
+            await resolve_lookups(session, normalized)
+
+    async with session_factory() as session:
+        async with session.begin():
+            staged = await load_staging(session, normalized)
+            await merge_staging(session, replace_children=True, include_lookups=False)
+            await session.execute(
+                pg_insert(models.IngestedFile)
+                .values(file_name=os.path.basename(path), checksum=checksum, row_count=staged)
+                .on_conflict_do_nothing(index_elements=['checksum'])
+            )
+    return staged
+
+
+async def directory_ingest(directory: str, concurrency: int = Config.DIRECTORY_CONCURRENCY,
+                           session_factory: Optional[sessionmaker] = None, on_progress=None) -> DirectoryReport:
+    """
+    Ingests every CSV/Parquet/Arrow file in `directory` that hasn't been ingested before,
+    up to `concurrency` files at a time. `on_progress(report)` is called once the files are
+    checked and again after each file finishes.
+    """
+    session_factory = session_factory or AsyncSessionFactory
+    report = DirectoryReport()
+
+    paths = list_source_files(directory)
+    checksums = await asyncio.gather(*[asyncio.to_thread(file_checksum, path) for path in paths])
+    report.files_found = len(paths)
+
+    async with session_factory() as session:
+        result = await session.execute(
+            select(models.IngestedFile.checksum)
+            .where(models.IngestedFile.checksum == any_(bindparam('checksums', value=list(checksums), type_=ARRAY(models.IngestedFile.checksum.type))))
+        )
+        seen = set(result.scalars().all())
+
+    pending = {}
+    for path, checksum in zip(paths, checksums):
+        if checksum in seen or checksum in pending:
+            logger.info(f"Skipping {os.path.basename(path)}: already ingested.")
+            report.skipped += 1
+        else:
+            pending[checksum] = path
+    logger.info(f"Found {report.files_found} files in {directory}; {len(pending)} to ingest.")
+    if on_progress:
+        on_progress(report)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(checksum: str, path: str):
+        name = os.path.basename(path)
+        async with semaphore:
+            try:
+                staged = await ingest_file(session_factory, path, checksum)
+                report.ingested += 1
+                report.rows += staged
+                logger.info(f"Ingested {name}: {staged} offerings.")
+            except Exception as e:
+                # Not recorded as ingested, so the next run retries it
+                report.failed += 1
+                report.errors[name] = str(e)
+                logger.error(f"Failed to ingest {name}: {e}", exc_info=True)
+        if on_progress:
+            on_progress(report)
+
+    await asyncio.gather(*[run(checksum, path) for checksum, path in pending.items()])
+    return report
+
+
+#Post-Ingest Refresh
+#Runs after the ingest has committed: the course summary view is refreshed, then the API's most-viewed
+#reports and term lists are rebuilt from the new data into a fresh cache version, which is switched in and announced.
+
+async def refresh_course_summaries(session_factory: Optional[sessionmaker] = None):
+    """Refreshes the course_summaries materialized view, creating it first on databases that predate it."""
+    async with (session_factory or AsyncSessionFactory)() as session:
+        async with session.begin():
+            # A view created before grade_counts existed still sums the grades table alone; rebuild it
+            definition = await session.scalar(text(
+                "SELECT definition FROM pg_matviews WHERE matviewname = 'course_summaries' AND schemaname = current_schema()"
+            ))
+            if definition is not None and 'grade_counts' not in definition:
+                await session.execute(text("DROP MATERIALIZED VIEW course_summaries"))
+            for ddl in models.COURSE_SUMMARY_DDL:
+                await session.execute(text(ddl))
+            # CONCURRENTLY keeps the view readable while it is rebuilt (it needs the unique index above)
+            await session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY course_summaries"))
+    logger.info("Course summaries refreshed.")
+
+
+async def refresh_caches(session_factory: Optional[sessionmaker] = None, warm: bool = True) -> int:
+    """
+    Bumps the dataset version so no cached entry from before the ingest is served again, warming the
+    new version from the committed data first unless `warm` is False. Returns the new version (0 if skipped).
+    """
+    cache = GradeCache(os.getenv("REDIS_URL"))
+    try:
+        async with (session_factory or AsyncSessionFactory)() as session:
+            return await warm_grade_caches(session, cache, warm=warm)
+    except Exception as e:
+        # The data is already committed; stale cache entries still expire on their own
+        logger.error(f"Cache refresh failed: {e}", exc_info=True)
+        return 0
+    finally:
+        await cache.close()
+
+
+# --- Main Execution ---
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ingest the grade sheet into the database.")
+    parser.add_argument('--input', default=Config.CSV_PATH,
+                        help="Path to the grade sheet: CSV, Parquet (.parquet/.pq) or Arrow IPC (.arrow/.feather/.ipc). "
+                             "In directory mode, the folder of grade sheets.")
+    parser.add_argument('--mode', choices=['row', 'bulk', 'incremental', 'stream', 'shadow', 'parallel', 'directory'],
+                        default=Config.DEFAULT_MODE,
+                        help="'row' upserts row by row; 'bulk' COPYs into staging tables and merges set-based; "
+                             "'incremental' applies only new, changed and removed offerings; "
+                             "'stream' does a bulk load chunk by chunk with a commit per chunk; "
+                             "'shadow' builds the data in a separate schema and swaps it in atomically; "
+                             "'parallel' merges course partitions concurrently over --workers connections; "
+                             "'directory' upserts every not-yet-ingested file in the --input folder, --workers files at a time.")
+    parser.add_argument('--changes-out', default=None,
+                        help="Incremental mode: write the change summary as JSON to this path.")
+    parser.add_argument('--chunk-size', type=int, default=Config.STREAM_CHUNK_SIZE,
+                        help="Stream mode: rows read, staged and committed per chunk.")
+    parser.add_argument('--checkpoint', default=None,
+                        help="Stream mode: checkpoint file (default: <input>.checkpoint.json).")
+    parser.add_argument('--resume', action='store_true',
+                        help="Stream mode: continue from the checkpoint instead of starting over.")
+    parser.add_argument('--no-cache-refresh', action='store_true',
+                        help="Don't warm the API's grade cache after committing. The dataset version is still bumped, "
+                             "so nothing cached before the ingest is served.")
+    parser.add_argument('--profile', action='store_true',
+                        help="Report the time spent in each ingest phase and the peak memory at the end.")
+    parser.add_argument('--workers', type=int, default=Config.PARALLEL_WORKERS,
+                        help="Parallel mode: number of partitions merged concurrently, one connection each. "
+                             "Directory mode: number of files ingested concurrently.")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[list] = None):
+    """Main function to run the data ingestion process."""
+    args = parse_args(argv)
+    if engine is None:
+        logger.error("FATAL: DATABASE_URL environment variable not set.")
+        exit(1)
+    logger.info(f"Starting data ingestion ({args.mode} mode) from: {args.input}")
+    profiler.enabled = args.profile
+    started = time.perf_counter()
+
+    if args.mode == 'directory':
+        try:
+            report = await directory_ingest(args.input, args.workers)
+        except FileNotFoundError:
+            logger.error(f"FATAL: Input directory not found at {args.input}.")
+            return
+        total_rows = successful_rows = report.rows
+        logger.info(f"Directory report: {json.dumps(asdict(report))}")
+    elif args.mode == 'stream':
+        checkpoint_path = args.checkpoint or f"{args.input}.checkpoint.json"
+        try:
+            total_rows, successful_rows = await stream_ingest(args.input, args.chunk_size, checkpoint_path, args.resume)
+        except FileNotFoundError:
+            logger.error(f"FATAL: Input file not found at {args.input}.")
+            return
+        except (ValueError, RuntimeError) as e:
+            logger.error(f"FATAL: {e}")
+            return
+    else:
+        try:
+            df = read_source(args.input)
+            logger.info(f"Loaded {len(df)} rows from {source_format(args.input)} input.")
+        except FileNotFoundError:
+            logger.error(f"FATAL: Input file not found at {args.input}.")
+            return
+        except ValueError:
+            logger.error("FATAL: Could not find start/end grade columns in the input.")
+            return
+        except RuntimeError as e:
+            logger.error(f"FATAL: {e}")
+            return
+
+        # Identify the grade columns dynamically
+        try:
+            grade_cols = find_grade_cols(df.columns)
+            logger.info(f"Identified {len(grade_cols)} grade columns to process.")
+        except ValueError:
+            logger.error("FATAL: Could not find start/end grade columns in the CSV.")
+            return
+
+        # All parsing and cleaning happens here, vectorized, before touching the database
+        with profiler.phase('normalize'):
+            normalized = normalize_frame(df, grade_cols)
+        logger.info(f"Normalized {len(normalized.offerings)} offerings, {len(normalized.instructors)} instructor links "
+                    f"and {len(normalized.grades)} grade counts.")
+        total_rows = len(df)
+
+        successful_rows = 0
+        if args.mode == 'shadow':
+            # Manages its own transactions: one to build, one short one to swap
+            successful_rows = await shadow_ingest(normalized)
+        elif args.mode == 'parallel':
+            successful_rows = await parallel_ingest(normalized, args.workers)
+        else:
+            async with AsyncSessionFactory() as session:
+                async with session.begin(): # A single transaction for the whole process
+                    if args.mode == 'bulk':
+                        successful_rows = await bulk_ingest(session, normalized)
+                    elif args.mode == 'incremental':
+                        summary = await incremental_ingest(session, normalized)
+                        successful_rows = summary.added + summary.changed + summary.unchanged
+                    else:
+                        await clear_existing_data(session)
+                    
+                        for index, parsed in enumerate(normalized.iter_parsed()):
+                            if index % 100 == 0 and index > 0:
+                                logger.info(f"Processing offering {index}/{len(normalized.offerings)}...")
+                        
+                            success = await process_row(session, parsed)
+                            if success:
+                                successful_rows += 1
     
+    elapsed = time.perf_counter() - started
     logger.info("--- Ingestion Complete ---")
-    logger.info(f"Successfully processed and upserted {successful_rows}/{len(df)} rows.")
+    logger.info(f"Successfully processed and upserted {successful_rows}/{total_rows} rows.")
+    logger.info(f"Took {elapsed:.2f}s ({total_rows / elapsed if elapsed > 0 else 0:.0f} rows/second).")
+    # An incremental run that found nothing to change leaves the cached data valid
+    nothing_changed = args.mode == 'incremental' and not summary.offering_ids
+    if successful_rows and not nothing_changed:
+        # The shadow swap brings a freshly built view with it
+        if args.mode != 'shadow':
+            with profiler.phase('summary refresh'):
+                await refresh_course_summaries()
+        with profiler.phase('cache refresh'):
+            await refresh_caches(warm=not args.no_cache_refresh)
+
+    if args.profile:
+        logger.info(f"Ingest profile ({args.mode} mode):\n{profiler.report(time.perf_counter() - started)}")
+
+    if args.mode == 'incremental':
+        logger.info(f"Change summary: {json.dumps(asdict(summary))}")
+        if args.changes_out:
+            with open(args.changes_out, 'w') as f:
+                json.dump(asdict(summary), f, indent=2)
+            logger.info(f"Change summary written to {args.changes_out}.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,170 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+#Synthetic Grade Sheets
+#Generates frames shaped like courses_with_fileids.csv, for benchmarks and load tests.
+#`generate_grade_frame` draws independent random rows; `generate_catalogue` builds a consistent
+#catalogue (every course offered across a range of years by a stable instructor roster) at a chosen scale.
+#Both lay their rows out with `_grade_sheet`, so counts and grade columns are generated the same way.
+
+#The real sheet's grade columns run from 'D+' to 'S^' (see Config.FIRST_GRADE_COL / LAST_GRADE_COL)
+GRADE_COLUMNS = ['D+', 'A*', 'A', 'B+', 'B', 'C+', 'C', 'D', 'E', 'F', 'I', 'S', 'X', 'W', 'S^']
+DEPARTMENTS = ['CS', 'EE', 'ME', 'CE', 'CHE', 'MTH', 'PHY', 'CHM', 'BSE', 'ECO', 'HSS', 'AE', 'MSE', 'ESC']
+SURNAMES = ['Sharma', 'Gupta', 'Verma', 'Agarwal', 'Mishra', 'Srivastava', 'Iyer', 'Reddy', 'Nair',
+            'Banerjee', 'Chatterjee', 'Mukherjee', 'Das', 'Singh', 'Kumar', 'Joshi', 'Kulkarni', 'Pandey']
+GIVEN_NAMES = ['amit', 'rahul', 'priya', 'sunita', 'arvind', 'deepak', 'kavita', 'manoj', 'neha',
+               'rajesh', 'sanjay', 'anjali', 'vivek', 'pooja', 'ashok', 'meena']
+
+
+def _grade_sheet(rng: np.random.Generator, codes, titles, instructors: list, years, semesters,
+                 grade_density: float, seed: int) -> pd.DataFrame:
+    """
+    Lays offerings out like the raw CSV: the given identity columns, random registration counts,
+    sparse grade counts (each cell filled with probability `grade_density`) and a plot file_id per row.
+    """
+    n_rows = len(codes)
+    registered = rng.integers(10, 400, n_rows)
+    frame = pd.DataFrame({
+        'Course': codes,
+        'course title': titles,
+        'Instructor': instructors,
+        'Academic Year': years,
+        'Semester': semesters,
+        'Total Registered': registered,
+        'Current Registered': registered - rng.integers(0, 10, n_rows),
+        'Total Drop': rng.integers(0, 10, n_rows),
+        'Accepted Drop': rng.integers(0, 5, n_rows),
+    })
+
+    counts = rng.integers(1, 60, (n_rows, len(GRADE_COLUMNS))).astype(float)
+    counts[rng.random(counts.shape) >= grade_density] = np.nan
+    for i, col in enumerate(GRADE_COLUMNS):
+        frame[col] = counts[:, i]
+
+    frame['telegram_file_id'] = [f"AgAC{seed:02d}{i:08d}" for i in range(n_rows)]
+    return frame
+
+
+def generate_grade_frame(n_rows: int, seed: int = 0, grade_density: float = 0.4) -> pd.DataFrame:
+    """Builds `n_rows` random offerings in the raw CSV layout (messy casing and blanks included)."""
+    rng = np.random.default_rng(seed)
+
+    dept = rng.choice(DEPARTMENTS, n_rows)
+    number = rng.integers(100, 800, n_rows)
+    suffix = rng.choice(['A', 'a', ''], n_rows, p=[0.7, 0.1, 0.2])
+    codes = pd.Series(dept).str.cat(number.astype(str)).str.cat(suffix)
+
+    start_year = rng.integers(2008, 2025, n_rows)
+    years = pd.Series(start_year.astype(str)).str.cat((start_year + 1).astype(str), sep='-')
+
+    # One to three instructors per offering, lower-cased and padded like the real sheet
+    people = np.char.add(np.char.add(rng.choice(GIVEN_NAMES, (n_rows, 3)), ' '), rng.choice(SURNAMES, (n_rows, 3)))
+    n_people = rng.integers(1, 4, n_rows)
+    instructors = [', '.join(people[i, :n_people[i]]) for i in range(n_rows)]
+    semesters = rng.choice(['Odd', 'Even', 'Summer'], n_rows, p=[0.48, 0.48, 0.04])
+
+    return _grade_sheet(rng, codes, 'Course ' + codes.str.upper(), instructors, years, semesters, grade_density, seed)
+
+
+def _instructor_pool(n_instructors: int, rng: np.random.Generator) -> np.ndarray:
+    """`n_instructors` distinct lower-case names; middle initials are added once the plain combinations run out."""
+    plain = [f"{given} {surname.lower()}" for given in GIVEN_NAMES for surname in SURNAMES]
+    initials = [f"{given} {chr(ord('a') + k)}. {surname.lower()}"
+                for k in range(26) for given in GIVEN_NAMES for surname in SURNAMES]
+    names = np.array(plain + initials, dtype=object)
+    if n_instructors > len(names):
+        raise ValueError(f"At most {len(names)} distinct instructor names can be generated.")
+    return rng.permutation(names)[:n_instructors]
+
+
+def generate_catalogue(
+    n_courses: int = 1500,
+    n_years: int = 15,
+    first_year: int = 2008,
+    instructors_per_offering: tuple = (1, 3),
+    n_instructors: int = 1200,
+    offer_rate: float = 0.85,
+    grade_density: float = 0.4,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Builds an IITK-shaped grade sheet: `n_courses` courses, each offered in its usual semester in each of
+    `n_years` academic years with probability `offer_rate`. Every course draws its instructors from a small
+    roster of its own, so names repeat across years the way they do in the real sheet. Each grade column is
+    filled with probability `grade_density`; the rest are left blank.
+    """
+    rng = np.random.default_rng(seed)
+
+    # Course codes are unique; departments and numbers are drawn until there are enough
+    codes = []
+    seen = set()
+    while len(codes) < n_courses:
+        code = f"{rng.choice(DEPARTMENTS)}{rng.integers(100, 1000)}"
+        if code not in seen:
+            seen.add(code)
+            codes.append(code)
+    codes = np.array(codes, dtype=object)
+    home_semester = rng.choice(['Odd', 'Even', 'Summer'], n_courses, p=[0.48, 0.48, 0.04])
+
+    # Offerings: the course x year grid, thinned by offer_rate
+    course_idx, year_idx = np.meshgrid(np.arange(n_courses), np.arange(n_years), indexing='ij')
+    course_idx, year_idx = course_idx.ravel(), year_idx.ravel()
+    offered = rng.random(len(course_idx)) < offer_rate
+    course_idx, year_idx = course_idx[offered], year_idx[offered]
+    n_rows = len(course_idx)
+
+    start_year = first_year + year_idx
+    years = pd.Series(start_year.astype(str)).str.cat((start_year + 1).astype(str), sep='-')
+
+    # Each course has a roster of 4 distinct instructors (more if an offering can take more); an offering takes a few of them
+    low, high = instructors_per_offering
+    pool = _instructor_pool(n_instructors, rng)
+    roster_size = max(high, 4)
+    rosters = np.stack([rng.choice(len(pool), roster_size, replace=False) for _ in range(n_courses)])
+    n_people = rng.integers(low, high + 1, n_rows)
+    instructors = [', '.join(pool[rosters[c, :k]]) for c, k in zip(course_idx, n_people)]
+
+    course_codes = pd.Series(codes[course_idx])
+    return _grade_sheet(rng, course_codes, 'Course ' + course_codes, instructors, years,
+                        home_semester[course_idx], grade_density, seed)
+
+
+def write_frame(frame: pd.DataFrame, path: str):
+    """Writes the frame as CSV, Parquet or Arrow IPC depending on the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.parquet', '.pq'):
+        frame.to_parquet(path, index=False)
+    elif ext in ('.arrow', '.feather', '.ipc'):
+        frame.to_feather(path)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic IITK-shaped grade sheet.")
+    parser.add_argument('output', help="Output path; .parquet/.pq and .arrow/.feather/.ipc switch the format from CSV.")
+    parser.add_argument('--courses', type=int, default=1500, help="Number of distinct courses.")
+    parser.add_argument('--years', type=int, default=15, help="Number of academic years.")
+    parser.add_argument('--first-year', type=int, default=2008, help="Start of the first academic year.")
+    parser.add_argument('--instructors-per-offering', type=int, nargs=2, default=(1, 3), metavar=('MIN', 'MAX'),
+                        help="Range of instructors listed per offering.")
+    parser.add_argument('--instructors', type=int, default=1200, help="Size of the instructor name pool.")
+    parser.add_argument('--offer-rate', type=float, default=0.85, help="Chance a course is offered in a given year.")
+    parser.add_argument('--grade-density', type=float, default=0.4, help="Chance a grade column has a count.")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed; the same arguments give the same file.")
+    args = parser.parse_args(argv)
+
+    frame = generate_catalogue(
+        n_courses=args.courses, n_years=args.years, first_year=args.first_year,
+        instructors_per_offering=tuple(args.instructors_per_offering), n_instructors=args.instructors,
+        offer_rate=args.offer_rate, grade_density=args.grade_density, seed=args.seed,
+    )
+    write_frame(frame, args.output)
+    print(f"Wrote {len(frame):,} offerings of {args.courses:,} courses to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
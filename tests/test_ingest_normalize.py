@@ -0,0 +1,48 @@
+import logging
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+import ingest_data
+from api import models
+
+
+def grade_sheet(grade_columns: dict) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Course': ['mth101', 'phy102'],
+        'course title': ['Mathematics I', 'Physics II'],
+        'Instructor': ['A Kumar', 'B Singh'],
+        'Academic Year': ['2023-2024', '2023-2024'],
+        'Semester': ['Odd', 'Even'],
+        **grade_columns,
+    })
+
+
+def test_grade_counts_follow_grade_types_order():
+    df = grade_sheet({'D+': ['1', '0'], 'A': ['4', '2'], 'S^': ['0', '3']})
+    normalized = ingest_data.normalize_frame(df, ingest_data.find_grade_cols(df.columns))
+
+    first = dict(zip(models.GRADE_TYPES, normalized.offerings['grade_counts'][0]))
+    assert first['D+'] == 1 and first['A'] == 4 and first['S^'] == 0
+    assert list(normalized.offerings['term_key']) == [20231, 20232]
+
+
+def test_unknown_grade_column_is_reported(caplog):
+    df = grade_sheet({'D+': ['1', '0'], 'Q': ['5', '6'], 'S^': ['0', '3']})
+    with caplog.at_level(logging.WARNING):
+        normalized = ingest_data.normalize_frame(df, ingest_data.find_grade_cols(df.columns))
+
+    assert any('Q' in record.getMessage() and 'GRADE_TYPES' in record.getMessage() for record in caplog.records)
+    # The counts reach the grades table instead of the dense vector; the known grades only go to the vector
+    assert set(normalized.grades['grade_type']) == {'Q'}
+    assert sum(normalized.offerings['grade_counts'][0]) == 1
+
+
+def test_known_grade_columns_log_nothing(caplog):
+    df = grade_sheet({'D+': ['1', '0'], 'S^': ['0', '3']})
+    with caplog.at_level(logging.WARNING):
+        ingest_data.normalize_frame(df, ingest_data.find_grade_cols(df.columns))
+
+    assert not caplog.records
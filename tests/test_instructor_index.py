@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), '..')))
+from api.instructor_index import InstructorIndex
+
+NAMES = [
+    'Rajkumar Singh', 'Raj Kumar', 'Sk Mishra', 'S. K. Mishra', 'Ashish Dutta', 'Prakash Jha',
+    'Santosh Kumar Mishra', 'Amit Kumar', 'Sandeep Chatterjee', 'Anjali Srivastava',
+]
+
+
+@pytest.fixture
+def index():
+    index = InstructorIndex()
+    index.build(list(enumerate(NAMES, start=1)))
+    return index
+
+
+def names(results):
+    return [name for _, name in results]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('kumar', {'Rajkumar Singh', 'Raj Kumar', 'Santosh Kumar Mishra', 'Amit Kumar'}),
+    ('raj kumar', {'Rajkumar Singh', 'Raj Kumar'}),
+    ('sk mishra', {'Sk Mishra', 'S. K. Mishra'}),
+    ('ash', {'Ashish Dutta', 'Prakash Jha'}),
+])
+def test_finds_every_substring_match(index, query, expected):
+    assert expected <= set(names(index.search(query)))
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('chaterjee', 'Sandeep Chatterjee'),
+    ('srivastav', 'Anjali Srivastava'),
+    ('santosh kumaar', 'Santosh Kumar Mishra'),
+])
+def test_tolerates_typos(index, query, expected):
+    assert expected in names(index.search(query))
+
+
+def test_substring_matches_rank_before_fuzzy_ones(index):
+    results = names(index.search('raj kumar'))
+    assert set(results[:2]) == {'Rajkumar Singh', 'Raj Kumar'}
+
+
+def test_limit_and_no_match(index):
+    assert len(index.search('a', limit=3)) == 3
+    assert index.search('zzzz') == []
+    assert index.search('...') == []